@@ -1,12 +1,48 @@
 import sys
-from flask import Flask, request, render_template
+import time
+from flask import Flask, Response, request, render_template, jsonify, g
 
-from src.logger import logging
+from src.logger import logging, hot_path
+from src.metrics import registry, timed, observe_request, CONTENT_TYPE
 from src.exception import CustomException
-from src.pipeline.predict_pipeline import PredictPipeline, CustomData
-from src.pipeline.train_pipeline import TrainPipeline
+from src.pipeline.predict_pipeline import (
+    PredictPipeline,
+    CustomData,
+    CustomBatchData,
+    PredictPipelineConfig,
+    predictor_cache,
+    prediction_memo,
+)
+from src.pipeline.train_jobs import train_job_manager
 
 app = Flask(__name__)
+app.config["MAX_BATCH_SIZE"] = PredictPipelineConfig.max_batch_size
+app.config["MAX_CONTENT_LENGTH"] = PredictPipelineConfig.max_content_length
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def log_request(response):
+    ## One structured line per request; sampled like the other hot-path records
+    ## unless the response is an error.
+    elapsed = time.perf_counter() - g.request_start
+    ## The URL rule, not the path, keeps /train/status/<job_id> one series.
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    observe_request(route, request.method, response.status_code, elapsed)
+    fields = hot_path(
+        method=request.method,
+        route=request.path,
+        status=response.status_code,
+        latency_ms=round(elapsed * 1000, 3),
+        rows=g.get("rows", "-"),
+    )
+    level = logging.WARNING if response.status_code >= 500 else logging.INFO
+    logging.log(level, "Request served.", extra=fields)
+    return response
 
 
 @app.route("/")
@@ -15,40 +51,105 @@ def index():
     return render_template("index.html")
 
 
-@app.route("/train")
+@app.route("/train", methods=["GET", "POST"])
 def training():
-    train = TrainPipeline()
-    tuned_score = train.run_pipeline()
-    accuracy = str(round(tuned_score, 2) * 100)[:2]
-    message = f"Model trained successfully with accuracy:{accuracy}%"
+    force = request.args.get("force") == "1"
+    job, created = train_job_manager.submit(force=force)
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"job_id": job.job_id, "created": created}), 202
+    state = "started" if created else "already running"
+    message = f"Training job {job.job_id} {state}. Status: /train/status/{job.job_id}"
     return render_template("index.html", message=message)
 
 
+@app.route("/train/status/<job_id>")
+def training_status(job_id):
+    job = train_job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/train/result/<job_id>")
+def training_result(job_id):
+    job = train_job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    if job.status in ("queued", "running"):
+        return jsonify(job.to_dict()), 202
+    if job.status == "failed":
+        return jsonify(job.to_dict()), 500
+    message = f"Model trained successfully with accuracy:{job.result['accuracy']}%"
+    return jsonify({**job.to_dict(), **job.result, "message": message})
+
+
 @app.route("/predict", methods=["GET", "POST"])
 def prediction():
     if request.method == "POST":
         try:
-            logging.info("Extracting input data...")
-            age = request.form.get("age")
-            sex = request.form.get("sex")
-            bmi = request.form.get("bmi")
-            children = request.form.get("children")
-            smoker = request.form.get("smoker")
-            region = request.form.get("region")
-
-            input_data = CustomData(age, sex, bmi, children, smoker, region)
-            dataframe = input_data.get_data_as_dataframe()
+            logging.info("Extracting input data...", extra=hot_path())
+            with timed("parse_form"):
+                age = request.form.get("age")
+                sex = request.form.get("sex")
+                bmi = request.form.get("bmi")
+                children = request.form.get("children")
+                smoker = request.form.get("smoker")
+                region = request.form.get("region")
+
+                input_data = CustomData(age, sex, bmi, children, smoker, region)
             preds = PredictPipeline()
-            result = preds.prediction(dataframe)
-            return render_template(
-                "home.html",
-                results="Predicted Insurance Amount ₹ {:.2f}".format(float(result[0])),
-            )
+            result = preds.fast_prediction([input_data.get_data_as_row()])
+            g.rows = 1
+            with timed("render_template"):
+                return render_template(
+                    "home.html",
+                    results="Predicted Insurance Amount ₹ {:.2f}".format(
+                        float(result[0])
+                    ),
+                )
         except Exception as e:
             raise CustomException(e, sys)
     else:
         return render_template("home.html")
 
 
+@app.route("/predict_batch", methods=["POST"])
+def batch_prediction():
+    try:
+        max_batch_size = app.config["MAX_BATCH_SIZE"]
+        if "file" in request.files:
+            batch = CustomBatchData.from_csv(request.files["file"], max_batch_size)
+        elif request.mimetype == "text/csv":
+            batch = CustomBatchData.from_csv(request.stream, max_batch_size)
+        else:
+            body = request.get_json(force=True, silent=True)
+            batch = CustomBatchData(body, max_batch_size)
+        dataframe = batch.get_data_as_dataframe()
+        g.rows = len(dataframe)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        preds = PredictPipeline(use_memo=False)
+        result = preds.prediction(dataframe)
+        return jsonify(
+            {"count": len(result), "predictions": [round(float(r), 2) for r in result]}
+        )
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+@app.route("/predictor_stats")
+def predictor_stats():
+    stats = predictor_cache.stats()
+    stats["memo"] = prediction_memo.stats()
+    return jsonify(stats)
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(registry.expose(), content_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080, debug=True)
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+from urllib.parse import parse_qsl
+
+from src.logger import logging, hot_path
+from src.metrics import registry, observe_request, CONTENT_TYPE
+from src.pipeline.predict_pipeline import (
+    PredictPipeline,
+    CustomData,
+    CustomBatchData,
+    predictor_cache,
+    prediction_memo,
+)
+from src.pipeline.micro_batcher import MicroBatcher, MicroBatcherConfig
+
+## Async serving mode: uvicorn asgi_app:app --host 0.0.0.0 --port 8080
+## Concurrent /predict requests are queued and scored together by the micro
+## batcher; MICRO_BATCH_MAX_SIZE=1 turns batching off.
+
+FIELDS = ("age", "sex", "bmi", "children", "smoker", "region")
+
+batcher = MicroBatcher(
+    PredictPipeline().fast_prediction,
+    max_batch_size=int(
+        os.getenv("MICRO_BATCH_MAX_SIZE", MicroBatcherConfig.max_batch_size)
+    ),
+    max_wait_ms=float(
+        os.getenv("MICRO_BATCH_MAX_WAIT_MS", MicroBatcherConfig.max_wait_ms)
+    ),
+)
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+    return status
+
+
+def parse_fields(headers, body):
+    content_type = headers.get(b"content-type", b"").decode()
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        data = dict(parse_qsl(body.decode()))
+    else:
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise ValueError("Body is not valid JSON.")
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object.")
+    missing = [field for field in FIELDS if data.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    ## Same rules as /predict_batch, checked before the row joins a micro-batch.
+    return CustomData(*CustomBatchData.validate_record(data))
+
+
+async def predict(scope, receive, send):
+    try:
+        input_data = parse_fields(dict(scope["headers"]), await read_body(receive))
+    except ValueError as e:
+        return await send_json(send, 400, {"error": str(e)})
+    try:
+        result = await batcher.submit(input_data.get_data_as_row())
+    except Exception as e:
+        ## The exception text carries file paths; it goes to the log only.
+        logging.warning(f"Prediction failed: {e}")
+        return await send_json(send, 500, {"error": "Prediction failed."})
+    return await send_json(send, 200, {"prediction": round(float(result), 2)})
+
+
+async def predictor_stats(scope, receive, send):
+    stats = predictor_cache.stats()
+    stats["memo"] = prediction_memo.stats()
+    stats["batcher"] = batcher.stats()
+    return await send_json(send, 200, stats)
+
+
+async def batcher_stats(scope, receive, send):
+    return await send_json(send, 200, batcher.stats())
+
+
+async def metrics(scope, receive, send):
+    body = registry.expose(batcher.batch_size, batcher.queue_wait).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", CONTENT_TYPE.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+    return 200
+
+
+ROUTES = {
+    ("POST", "/predict"): predict,
+    ("GET", "/predictor_stats"): predictor_stats,
+    ("GET", "/batcher_stats"): batcher_stats,
+    ("GET", "/metrics"): metrics,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    start = time.perf_counter()
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        status = await send_json(send, 404, {"error": f"Unknown route {scope['path']}"})
+    else:
+        status = await handler(scope, receive, send)
+    elapsed = time.perf_counter() - start
+    route = scope["path"] if handler is not None else "unmatched"
+    observe_request(route, scope["method"], status, elapsed)
+    fields = hot_path(
+        method=scope["method"],
+        route=scope["path"],
+        status=status,
+        latency_ms=round(elapsed * 1000, 3),
+    )
+    logging.info("Request served.", extra=fields)
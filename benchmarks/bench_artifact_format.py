@@ -0,0 +1,54 @@
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+from src.utils import save_table, load_table
+from benchmarks.synthetic import resample_insurance
+
+## Usage: python -m benchmarks.bench_artifact_format --rows 1000000
+
+
+def measure(func):
+    ## Timed without tracing first (tracemalloc slows python-level writers),
+    ## then re-run under tracemalloc for the allocation peak.
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = resample_insurance(args.rows)
+    print(f"{args.rows} rows\n")
+    print(
+        f"{'format':<10}{'write_s':>9}{'read_s':>9}{'read_peak_mb':>14}{'size_mb':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for artifact_format in ("csv", "parquet", "feather"):
+            path = os.path.join(tmp_dir, f"data.{artifact_format}")
+            _, write_s, _ = measure(lambda: save_table(data, path))
+            _, read_s, read_mb = measure(lambda: load_table(path))
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(
+                f"{artifact_format:<10}{write_s:>9.2f}{read_s:>9.2f}"
+                f"{read_mb:>14.1f}{size_mb:>9.1f}"
+            )
+
+        matrix = np.random.default_rng(0).random((args.rows, 12))
+        path = os.path.join(tmp_dir, "train_arr.npy")
+        np.save(path, matrix)
+        print(f"\n{'array load':<12}{'seconds':>9}{'peak_mb':>9}")
+        for label, mmap_mode in (("np.load", None), ("mmap", "r")):
+            _, seconds, peak_mb = measure(lambda: np.load(path, mmap_mode=mmap_mode))
+            print(f"{label:<12}{seconds:>9.3f}{peak_mb:>9.1f}")
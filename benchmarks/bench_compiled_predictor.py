@@ -0,0 +1,73 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import LinearRegression
+from src.utils import load_object
+from src.pipeline.compiled_predictor import CompiledPredictor
+
+## Usage: python -m benchmarks.bench_compiled_predictor
+
+FEATURES = ["age", "sex", "bmi", "children", "smoker", "region"]
+## Max abs error relative to the largest prediction; ill-conditioned one-hot
+## coefficients (~1e13) already cost the sklearn path itself ~1e-6 here.
+TOLERANCE = 1e-5
+
+
+def best_of(func, repeat=5, number=200):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def compare(label, preprocessor, model, rows):
+    frame = pd.DataFrame(rows, columns=FEATURES)
+    compiled = CompiledPredictor(preprocessor, model)
+
+    expected = model.predict(preprocessor.transform(frame))
+    actual = compiled.predict(rows)
+    max_rel_err = float(np.max(np.abs(actual - expected)) / np.max(np.abs(expected)))
+    assert max_rel_err < TOLERANCE, f"{label}: mismatch {max_rel_err}"
+
+    row = [rows[0]]
+    sklearn_one = best_of(
+        lambda: model.predict(
+            preprocessor.transform(pd.DataFrame(row, columns=FEATURES))
+        )
+    )
+    compiled_one = best_of(lambda: compiled.predict(row))
+    sklearn_batch = best_of(
+        lambda: model.predict(
+            preprocessor.transform(pd.DataFrame(rows, columns=FEATURES))
+        ),
+        number=5,
+    )
+    compiled_batch = best_of(lambda: compiled.predict(rows), number=5)
+
+    print(f"\n[{label}] linear_fold={compiled.linear} max_rel_err={max_rel_err:.2e}")
+    print(
+        f"  single row : sklearn {sklearn_one * 1e6:9.1f} us | compiled {compiled_one * 1e6:9.1f} us | x{sklearn_one / compiled_one:.1f}"
+    )
+    print(
+        f"  {len(rows)} rows: sklearn {sklearn_batch * 1e3:9.2f} ms | compiled {compiled_batch * 1e3:9.2f} ms | x{sklearn_batch / compiled_batch:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    preprocessor = load_object(os.path.join("artifacts", "preprocessor.pkl"))
+    model = load_object(os.path.join("artifacts", "model.pkl"))
+    data = pd.read_csv(os.path.join("artifacts", "test.csv"))
+    rows = list(data[FEATURES].itertuples(index=False, name=None)) * 8
+
+    compare(type(model).__name__, preprocessor, model, rows)
+
+    train = pd.read_csv(os.path.join("artifacts", "train.csv"))
+    linear = LinearRegression().fit(
+        preprocessor.transform(train[FEATURES]), train["expenses"]
+    )
+    compare("LinearRegression", preprocessor, linear, rows)
@@ -0,0 +1,64 @@
+import os
+import time
+import sqlite3
+import tempfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from src.database import (
+    CREATE_TABLE,
+    INSERT_VALUES,
+    DatabaseConnect,
+    DatabaseConnectConfig,
+)
+
+## Usage: python -m benchmarks.bench_database --rows 2000 --threads 4
+
+ROW = ("bench", 30.0, "male", 25.0, 1.0, "no", "northeast", 6267.01)
+
+
+def legacy_insert(database_path):
+    ## The previous code path: new connection + CREATE TABLE + single-row commit.
+    conn = sqlite3.connect(database_path)
+    cursor = conn.cursor()
+    cursor.execute(CREATE_TABLE)
+    conn.commit()
+    cursor.execute(INSERT_VALUES, ROW)
+    conn.commit()
+    conn.close()
+
+
+def run(label, insert, rows, threads):
+    start = time.perf_counter()
+    errors = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(insert) for _ in range(rows)]:
+            try:
+                future.result()
+            except sqlite3.OperationalError:
+                errors += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16}{rows / elapsed:>12.0f} rows/s{errors:>8} errors")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, "legacy.db")
+        run("legacy", lambda: legacy_insert(legacy_path), args.rows, args.threads)
+
+        DatabaseConnectConfig.database_path = os.path.join(tmp_dir, "pooled.db")
+        connect = DatabaseConnect()
+        run(
+            "pooled+batched",
+            lambda: connect.insert_lite_data(*ROW),
+            args.rows,
+            args.threads,
+        )
+        data, _ = connect.display_user_database()
+        assert len(data) == args.rows, len(data)
+        connect.batch_writer.pool.close_all()
@@ -0,0 +1,69 @@
+import argparse
+import tracemalloc
+import numpy as np
+
+from src.components.data_transformation import (
+    DataTransformation,
+    DataTransformationConfig,
+)
+from benchmarks.synthetic import resample_insurance
+
+## Usage: python -m benchmarks.bench_handoff --rows 1000000
+
+
+def transformation(dtype="float64", keep_sparse=False):
+    obj = DataTransformation()
+    obj.data_transformation_config = DataTransformationConfig()
+    obj.data_transformation_config.dtype = dtype
+    obj.data_transformation_config.keep_sparse = keep_sparse
+    return obj
+
+
+def legacy_handoff(data, target):
+    ## The previous path: np.c_ joins X and y, ModelTrainer slices them apart and
+    ## the estimator copies the non-contiguous X[:, :-1] view again.
+    preprocessor = transformation().get_transformer_object(data.head(0))
+    X = preprocessor.fit_transform(data.drop(target, axis=1))
+    train_arr = np.c_[X, np.array(data[target])]
+    X_train, y_train = train_arr[:, :-1], train_arr[:, -1]
+    return np.asarray(X_train, order="C", dtype=np.float64), y_train
+
+
+def new_handoff(data, target, dtype, keep_sparse):
+    obj = transformation(dtype, keep_sparse)
+    preprocessor = obj.get_transformer_object(data.head(0))
+    X_train = obj._as_model_input(preprocessor.fit_transform(data.drop(target, axis=1)))
+    y_train = np.ascontiguousarray(data[target], dtype=np.float64)
+    return X_train, y_train
+
+
+def measure(func):
+    tracemalloc.start()
+    X_train, y_train = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hasattr(X_train, "nnz"):
+        size = X_train.data.nbytes + X_train.indices.nbytes + X_train.indptr.nbytes
+    else:
+        size = X_train.nbytes
+    return peak / (1024 * 1024), (size + y_train.nbytes) / (1024 * 1024)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = resample_insurance(args.rows)
+    target = DataTransformationConfig.target_column
+    print(f"{args.rows} rows\n")
+    print(f"{'handoff':<16}{'peak_mb':>9}{'result_mb':>11}")
+    cases = (
+        ("np.c_ + slice", lambda: legacy_handoff(data, target)),
+        ("float64", lambda: new_handoff(data, target, "float64", False)),
+        ("float32", lambda: new_handoff(data, target, "float32", False)),
+        ("float64 sparse", lambda: new_handoff(data, target, "float64", True)),
+    )
+    for label, func in cases:
+        peak_mb, result_mb = measure(func)
+        print(f"{label:<16}{peak_mb:>9.1f}{result_mb:>11.1f}")
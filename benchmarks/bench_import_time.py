@@ -0,0 +1,55 @@
+import sys
+import argparse
+import subprocess
+
+## Usage: python -m benchmarks.bench_import_time --budget-ms 1000
+## Exits non-zero when a serving import goes over budget or loads the training stack.
+
+SERVING_MODULES = ("src.pipeline.predict_pipeline", "app")
+TRAINING_ONLY = ("mlflow", "sklearn.ensemble", "sklearn.model_selection")
+
+
+def import_time(module):
+    ## -X importtime writes "import time: self | cumulative | name" lines to stderr,
+    ## the cumulative column of the top-level module is the cold import cost.
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {TRAINING_ONLY!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=SERVING_MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<34}{'median_ms':>10}{'budget_ms':>10}  training modules")
+    for module in args.modules:
+        runs = [import_time(module) for _ in range(args.repeat)]
+        median_ms = sorted(ms for ms, _ in runs)[len(runs) // 2]
+        loaded = runs[-1][1]
+        over = median_ms > args.budget_ms or bool(loaded)
+        failed = failed or over
+        print(
+            f"{module:<34}{median_ms:>10.1f}{args.budget_ms:>10.0f}  "
+            f"{', '.join(loaded) or '-'}{'  FAIL' if over else ''}"
+        )
+    sys.exit(1 if failed else 0)
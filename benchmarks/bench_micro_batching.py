@@ -0,0 +1,104 @@
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+import asgi_app
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.pipeline.micro_batcher import MicroBatcher
+from benchmarks.synthetic import resample_insurance
+
+## Usage: python -m benchmarks.bench_micro_batching --requests 2000 --concurrency 64
+## Drives the ASGI app in-process with --concurrency clients posting single rows
+## and compares batching off (max batch size 1) with the configured batcher.
+## Needs trained artifacts.
+
+
+async def call(body):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/predict",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    await asgi_app.app(scope, receive, send)
+    return sent[0]["status"]
+
+
+async def load(bodies, concurrency):
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    latencies = []
+
+    async def client():
+        while not queue.empty():
+            body = queue.get_nowait()
+            start = time.perf_counter()
+            status = await call(body)
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def run(bodies, concurrency, max_batch_size, max_wait_ms):
+    asgi_app.batcher = MicroBatcher(
+        PredictPipeline(use_memo=False).fast_prediction, max_batch_size, max_wait_ms
+    )
+    elapsed, latencies = asyncio.run(load(bodies, concurrency))
+    stats = asgi_app.batcher.stats()
+    return {
+        "max_batch_size": max_batch_size,
+        "max_wait_ms": max_wait_ms,
+        "requests_per_s": len(bodies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "mean_batch_size": stats["batch_size"]["sum"]
+        / max(stats["batch_size"]["count"], 1),
+        "p99_queue_wait_le_s": asgi_app.batcher.queue_wait.quantile(0.99),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    data = resample_insurance(args.requests).drop("expenses", axis=1)
+    bodies = [json.dumps(record).encode() for record in data.to_dict("records")]
+    ## Warm the predictor cache so artifact loading is not timed.
+    PredictPipeline(use_memo=False).fast_prediction([tuple(data.iloc[0])])
+
+    results = [
+        run(bodies, args.concurrency, 1, 0.0),
+        run(bodies, args.concurrency, args.max_batch_size, args.max_wait_ms),
+    ]
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients\n")
+    print(
+        f"{'batch':>6}{'wait_ms':>9}{'req/s':>10}{'p50_ms':>9}{'p99_ms':>9}{'mean_bs':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['max_batch_size']:>6}{result['max_wait_ms']:>9.1f}"
+            f"{result['requests_per_s']:>10.0f}{result['p50_ms']:>9.2f}"
+            f"{result['p99_ms']:>9.2f}{result['mean_batch_size']:>9.1f}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from src.utils import save_object
+from src.model_bundle import save_bundle
+from src.components.data_transformation import (
+    DataTransformation,
+    DataTransformationConfig,
+)
+from benchmarks.synthetic import resample_insurance
+
+## Usage: python -m benchmarks.bench_model_bundle --rows 100000 --workers 4
+## Starts --workers processes per format that each load the artifacts and stay
+## alive, then reads their RSS and PSS (shared pages split between sharers).
+
+WORKER = """
+import sys, time, json
+import sklearn.ensemble, sklearn.linear_model, sklearn.compose, dill
+start = time.perf_counter()
+if sys.argv[1] == "bundle":
+    from src.model_bundle import load_bundle
+    preprocessor, model, _ = load_bundle(sys.argv[2])
+else:
+    from src.utils import load_object
+    preprocessor, model = load_object(sys.argv[2]), load_object(sys.argv[3])
+print(json.dumps({"load_s": time.perf_counter() - start}), flush=True)
+sys.stdin.read()
+"""
+
+
+def memory_mb(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def run_workers(args, workers):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, *args],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    loads = [json.loads(process.stdout.readline())["load_s"] for process in processes]
+    memory = [memory_mb(process.pid) for process in processes]
+    for process in processes:
+        process.communicate("")
+    return {
+        "load_s": float(np.median(loads)),
+        "rss_mb": sum(m["rss"] for m in memory),
+        "pss_mb": sum(m["pss"] for m in memory),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--model", choices=["forest", "linear"], default="forest")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    data = resample_insurance(args.rows)
+    target = DataTransformationConfig.target_column
+    preprocessor = DataTransformation().get_transformer_object(data.head(0))
+    X = preprocessor.fit_transform(data.drop(target, axis=1))
+    if args.model == "forest":
+        model = RandomForestRegressor(n_estimators=100, n_jobs=-1, random_state=42)
+    else:
+        model = LinearRegression()
+    model.fit(X, data[target])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        preprocessor_path = os.path.join(tmp_dir, "preprocessor.pkl")
+        model_path = os.path.join(tmp_dir, "model.pkl")
+        bundle_path = os.path.join(tmp_dir, "model_bundle.bin")
+        save_object(preprocessor, preprocessor_path)
+        save_object(model, model_path)
+        save_bundle(preprocessor, model, bundle_path)
+        size_mb = {
+            "dill": (os.path.getsize(preprocessor_path) + os.path.getsize(model_path))
+            / (1024 * 1024),
+            "bundle": os.path.getsize(bundle_path) / (1024 * 1024),
+        }
+
+        print(f"{args.model}, {args.rows} rows, {args.workers} workers\n")
+        print(f"{'format':<8}{'file_mb':>9}{'load_s':>9}{'rss_mb':>9}{'pss_mb':>9}")
+        for label, worker_args in (
+            ("dill", ["dill", preprocessor_path, model_path]),
+            ("bundle", ["bundle", bundle_path]),
+        ):
+            result = run_workers(worker_args, args.workers)
+            print(
+                f"{label:<8}{size_mb[label]:>9.1f}{result['load_s']:>9.3f}"
+                f"{result['rss_mb']:>9.1f}{result['pss_mb']:>9.1f}"
+            )
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import r2_score
+from src.utils import load_object, load_yaml
+from src.training_utils import SEARCH_STRATEGIES, SEARCH_DEFAULTS
+
+## Usage: python -m benchmarks.bench_search_strategies --model Gradient_boost_reg
+##        --strategies random halving grid --time-budget 120
+
+MODELS = {
+    "Gradient_boost_reg": GradientBoostingRegressor,
+    "Random_forest_reg": RandomForestRegressor,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="Gradient_boost_reg", choices=list(MODELS))
+    parser.add_argument(
+        "--strategies", nargs="+", default=["random", "halving", "grid"]
+    )
+    parser.add_argument("--time-budget", type=float, default=None)
+    args = parser.parse_args()
+
+    params = load_yaml(os.path.join("config", "params.yaml"))
+    search_config = {**SEARCH_DEFAULTS, **(params.get("search") or {})}
+    if args.time_budget is not None:
+        search_config["time_budget"] = args.time_budget
+    param_grid = params["models"][args.model]["param_grid"]
+
+    preprocessor = load_object(os.path.join("artifacts", "preprocessor.pkl"))
+    train = pd.read_csv(os.path.join("artifacts", "train.csv"))
+    test = pd.read_csv(os.path.join("artifacts", "test.csv"))
+    X_train = preprocessor.transform(train.drop(columns="expenses"))
+    X_test = preprocessor.transform(test.drop(columns="expenses"))
+    y_train, y_test = train["expenses"].to_numpy(), test["expenses"].to_numpy()
+
+    print(
+        f"{'strategy':<10}{'candidates':>12}{'seconds':>10}{'cv_r2':>9}{'test_r2':>9}"
+    )
+    for strategy in args.strategies:
+        model = MODELS[args.model](random_state=search_config["random_state"])
+        start = time.perf_counter()
+        best_params, cv_score, evaluated = SEARCH_STRATEGIES[strategy](
+            model, param_grid, X_train, y_train, search_config
+        )
+        elapsed = time.perf_counter() - start
+        test_score = r2_score(
+            y_test,
+            model.set_params(**best_params).fit(X_train, y_train).predict(X_test),
+        )
+        print(
+            f"{strategy:<10}{evaluated:>12}{elapsed:>10.1f}{cv_score:>9.4f}{test_score:>9.4f}"
+        )
+        sys.stdout.flush()
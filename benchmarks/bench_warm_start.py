@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+from sklearn.ensemble import (
+    AdaBoostRegressor,
+    GradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from src.utils import load_object, load_yaml
+from src.training_utils import SEARCH_DEFAULTS, grid_search
+
+## Usage: python -m benchmarks.bench_warm_start --models Ada_boost_reg --values 2
+## Runs the grid search of each model twice, plain GridSearchCV and with the
+## n_estimators sweep, and checks both pick the same parameters. --values keeps
+## the first N values of every other parameter so forest/boosting grids finish.
+
+MODELS = {
+    "Ada_boost_reg": AdaBoostRegressor,
+    "Gradient_boost_reg": GradientBoostingRegressor,
+    "Random_forest_reg": RandomForestRegressor,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=MODELS)
+    parser.add_argument("--values", type=int, default=2)
+    args = parser.parse_args()
+
+    params = load_yaml(os.path.join("config", "params.yaml"))
+    search_config = {**SEARCH_DEFAULTS, **(params.get("search") or {})}
+
+    preprocessor = load_object(os.path.join("artifacts", "preprocessor.pkl"))
+    train = pd.read_csv(os.path.join("artifacts", "train.csv"))
+    X_train = preprocessor.transform(train.drop(columns="expenses"))
+    y_train = train["expenses"].to_numpy()
+
+    print(
+        f"{'model':<20}{'candidates':>11}{'grid_s':>9}{'sweep_s':>9}"
+        f"{'speedup':>9}{'same_best':>10}{'cv_diff':>10}"
+    )
+    for name in args.models:
+        param_grid = {
+            key: values if key == "n_estimators" else values[: args.values]
+            for key, values in params["models"][name]["param_grid"].items()
+        }
+        results = {}
+        for warm_start in (False, True):
+            model = MODELS[name](random_state=search_config["random_state"])
+            start = time.perf_counter()
+            results[warm_start] = grid_search(
+                model,
+                param_grid,
+                X_train,
+                y_train,
+                {**search_config, "warm_start": warm_start},
+            ) + (time.perf_counter() - start,)
+        grid_params, grid_score, evaluated, grid_s = results[False]
+        sweep_params, sweep_score, _, sweep_s = results[True]
+        print(
+            f"{name:<20}{evaluated:>11}{grid_s:>9.1f}{sweep_s:>9.1f}"
+            f"{grid_s / sweep_s:>9.1f}{str(grid_params == sweep_params):>10}"
+            f"{abs(grid_score - sweep_score):>10.1e}"
+        )
+        sys.stdout.flush()
@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+import sklearn
+
+from src.utils import missing_treatment
+from src.training_utils import get_best_model
+from src.components.data_transformation import (
+    DataTransformation,
+    DataTransformationConfig,
+)
+from src.pipeline.predict_pipeline import PredictPipeline, CustomData
+from src.database import DatabaseConnect, DatabaseConnectConfig
+from benchmarks.synthetic import resample_insurance, parse_rows
+
+## Usage: python -m benchmarks.suite --rows 100k --output bench.json
+##        python -m benchmarks.suite --compare before.json after.json --threshold 1.2
+
+FEATURES = ["age", "sex", "bmi", "children", "smoker", "region"]
+TARGET = DataTransformationConfig.target_column
+
+
+def measure(func, repeat=5, number=1, setup=None):
+    ## Each repeat times `number` calls; setup runs untimed and feeds func.
+    timings = []
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        timings.append((time.perf_counter() - start) / number)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "number": number,
+        "min_s": timings[0],
+        "median_s": timings[len(timings) // 2],
+        "mean_s": sum(timings) / len(timings),
+        "max_s": timings[-1],
+    }
+
+
+def bench_prediction(data, args):
+    pipeline = PredictPipeline(use_memo=False)
+    single = data[FEATURES].head(1)
+    row = tuple(single.iloc[0])
+    results = {
+        "custom_data_dataframe": measure(
+            lambda: CustomData(*row).get_data_as_dataframe(), number=1000
+        ),
+        "predict_single": measure(lambda: pipeline.prediction(single), number=200),
+        "fast_predict_single": measure(
+            lambda: pipeline.fast_prediction([row]), number=200
+        ),
+    }
+    for batch_size in args.batch_sizes:
+        if batch_size > len(data):
+            continue
+        batch = data[FEATURES].head(batch_size)
+        result = measure(lambda: pipeline.prediction(batch))
+        result["rows_per_s"] = batch_size / result["median_s"]
+        results[f"predict_batch_{batch_size}"] = result
+    return results
+
+
+def bench_preprocessing(data, args):
+    with_missing = data.copy()
+    rng = np.random.default_rng(0)
+    for col in FEATURES:
+        with_missing.loc[rng.random(len(data)) < 0.05, col] = np.nan
+
+    X = data.drop(TARGET, axis=1)
+    transformation = DataTransformation()
+    preprocessor = transformation.get_transformer_object(data.head(0)).fit(X)
+    return {
+        "missing_treatment": measure(
+            missing_treatment, repeat=3, setup=with_missing.copy
+        ),
+        "transformation_fit": measure(
+            lambda: transformation.get_transformer_object(data.head(0)).fit(X),
+            repeat=3,
+        ),
+        "transformation_transform": measure(
+            lambda: preprocessor.transform(X), repeat=3
+        ),
+    }
+
+
+def bench_candidates(data, args):
+    ## Fitted on the first --train-rows rows only; GradientBoosting on 10M rows
+    ## would turn the suite into a training run.
+    sample = data.head(args.train_rows)
+    preprocessor = DataTransformation().get_transformer_object(sample.head(0))
+    X = preprocessor.fit_transform(sample.drop(TARGET, axis=1))
+    y = sample[TARGET].to_numpy(dtype=np.float64)
+    split = int(len(y) * 0.8)
+    model_report, *_ = get_best_model(X[:split], X[split:], y[:split], y[split:])
+    return {
+        f"candidate_{name}": {**report, "train_rows": split}
+        for name, report in model_report.items()
+    }
+
+
+def bench_database(data, args):
+    rows = [
+        ("bench", *record)
+        for record in data[FEATURES + [TARGET]]
+        .head(args.db_rows)
+        .itertuples(index=False, name=None)
+    ]
+    database_path = DatabaseConnectConfig.database_path
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        DatabaseConnectConfig.database_path = os.path.join(tmp_dir, "bench.db")
+        try:
+            connect = DatabaseConnect()
+
+            def insert():
+                for row in rows:
+                    connect.insert_lite_data(*row)
+                connect.batch_writer.flush()
+
+            insert_result = measure(insert, repeat=3)
+            insert_result["rows_per_s"] = len(rows) / insert_result["median_s"]
+            results = {
+                "database_insert": insert_result,
+                "database_read_all": measure(connect.display_user_database, repeat=3),
+                "database_read_page": measure(
+                    lambda: connect.query_user_details(region="southeast"),
+                    number=100,
+                ),
+                "database_read_page_age": measure(
+                    lambda: connect.query_user_details(min_age=30, max_age=50),
+                    number=100,
+                ),
+                "database_read_page_region_age": measure(
+                    lambda: connect.query_user_details(
+                        region="southeast", min_age=30, max_age=50
+                    ),
+                    number=100,
+                ),
+            }
+            connect.batch_writer.pool.close_all()
+        finally:
+            DatabaseConnectConfig.database_path = database_path
+    return results
+
+
+BENCHMARKS = {
+    "prediction": bench_prediction,
+    "preprocessing": bench_preprocessing,
+    "candidates": bench_candidates,
+    "database": bench_database,
+}
+
+
+def metadata(n_rows):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "rows": n_rows,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def compare(before_path, after_path, threshold):
+    with open(before_path) as file:
+        before = json.load(file)["results"]
+    with open(after_path) as file:
+        after = json.load(file)["results"]
+
+    regressions = []
+    print(f"{'benchmark':<40}{'before':>12}{'after':>12}{'ratio':>8}")
+    for name in sorted(set(before) & set(after)):
+        key = "median_s" if "median_s" in after[name] else "fit_time"
+        if key not in before[name] or not before[name][key]:
+            continue
+        ratio = after[name][key] / before[name][key]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(
+            f"{name:<40}{before[name][key]:>12.6f}{after[name][key]:>12.6f}"
+            f"{ratio:>8.2f}{flag}"
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="100k", help="100k, 1m, 10m or a number")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument(
+        "--batch-sizes", nargs="+", type=int, default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--db-rows", type=int, default=5000)
+    parser.add_argument("--output", default=None, help="JSON file, stdout if unset")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    n_rows = parse_rows(args.rows)
+    data = resample_insurance(n_rows)
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        start = time.perf_counter()
+        results.update(bench(data, args))
+        print(f"{name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    output = json.dumps({"meta": metadata(n_rows), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,58 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+## Usage: python -m benchmarks.synthetic --rows 10m --output data_raw/insurance_10m.csv
+
+SOURCE_PATH = os.path.join("data_raw", "insurance.csv")
+SCALES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def parse_rows(value):
+    return SCALES.get(str(value).lower()) or int(value)
+
+
+def _resample(source, n_rows, rng):
+    data = source.iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+    data["age"] = (data["age"] + rng.integers(-1, 2, n_rows)).clip(
+        source["age"].min(), source["age"].max()
+    )
+    data["bmi"] = (data["bmi"] * rng.normal(1.0, 0.02, n_rows)).round(1)
+    data["expenses"] = (data["expenses"] * rng.normal(1.0, 0.05, n_rows)).round(2)
+    return data
+
+
+def resample_insurance(n_rows, source_path=SOURCE_PATH, random_state=42):
+    ## Bootstrap rows of the source file and jitter age/bmi/expenses, so columns
+    ## keep their joint distribution without producing exact duplicates.
+    rng = np.random.default_rng(random_state)
+    return _resample(pd.read_csv(source_path), n_rows, rng)
+
+
+def write_synthetic(
+    n_rows, output_path, source_path=SOURCE_PATH, random_state=42, chunk_size=1_000_000
+):
+    ## Written chunk by chunk so 10M rows never have to sit in memory at once.
+    source = pd.read_csv(source_path)
+    rng = np.random.default_rng(random_state)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    for start in range(0, n_rows, chunk_size):
+        chunk = _resample(source, min(chunk_size, n_rows - start), rng)
+        chunk.to_csv(
+            output_path, mode="w" if start == 0 else "a", index=False, header=start == 0
+        )
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="100k", help="100k, 1m, 10m or a number")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    path = write_synthetic(
+        parse_rows(args.rows), args.output, random_state=args.random_state
+    )
+    print(f"Wrote {parse_rows(args.rows)} rows to {path}")
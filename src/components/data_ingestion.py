@@ -1,19 +1,34 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
+from collections import Counter
 from dataclasses import dataclass
 
 from src.logger import logging
 from src.exception import CustomException
+from src.profiler import profile_step
 from sklearn.model_selection import train_test_split
-from src.utils import missing_treatment
+from src.utils import missing_treatment, save_table, table_path, iter_table, ChunkWriter
+from src.quantile_sketch import QuantileSketch
 
 
 @dataclass
 class DataIngestionConfig:
+    artifact_format = "csv"  # csv | parquet | feather
     train_data_path = os.path.join("artifacts", "train.csv")
     test_data_path = os.path.join("artifacts", "test.csv")
     raw_data_path = os.path.join("artifacts", "data.csv")
+    source_data_path = os.path.join("data_raw", "insurance.csv")
+    chunk_size = 100_000  # rows per chunk in streaming mode
+    test_size = 0.2
+    random_state = 42  # also the key of the streaming split hash
+    sketch_k = 200  # median rank error about 1.7/k in streaming mode
+
+    def __post_init__(self):
+        for name in ("train_data_path", "test_data_path", "raw_data_path"):
+            path = getattr(self, name)
+            setattr(self, name, table_path(path, self.artifact_format))
 
 
 class DataIngestion:
@@ -27,23 +42,25 @@ class DataIngestion:
             )
 
             logging.info("Getting the source data...")
-            source_path = os.path.join("data_raw", "insurance.csv")
-            df = pd.read_csv(source_path)
+            with profile_step("read"):
+                df = pd.read_csv(self.data_ingestion_config.source_data_path)
 
-            df = missing_treatment(df)
+            with profile_step("impute"):
+                df = missing_treatment(df)
             logging.info(f"Treatment for any missing data.\n{df.isnull().sum()}")
-            df.to_csv(
-                self.data_ingestion_config.raw_data_path, header=True, index=False
-            )
+            with profile_step("write_raw"):
+                save_table(df, self.data_ingestion_config.raw_data_path)
 
             logging.info("Splitting the data into train and test...")
-            train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
-            train_df.to_csv(
-                self.data_ingestion_config.train_data_path, header=True, index=False
-            )
-            test_df.to_csv(
-                self.data_ingestion_config.test_data_path, header=True, index=False
-            )
+            with profile_step("split"):
+                train_df, test_df = train_test_split(
+                    df,
+                    test_size=self.data_ingestion_config.test_size,
+                    random_state=self.data_ingestion_config.random_state,
+                )
+            with profile_step("write_split"):
+                save_table(train_df, self.data_ingestion_config.train_data_path)
+                save_table(test_df, self.data_ingestion_config.test_data_path)
 
             logging.info("All data files are saved.")
             return (
@@ -53,3 +70,73 @@ class DataIngestion:
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def fill_values(self, source_path):
+        ## Streaming counterpart of missing_treatment's statistics: a quantile
+        ## sketch per numeric column for the median and a value counter per
+        ## object column for the mode (ties to the smallest, as Series.mode).
+        config = self.data_ingestion_config
+        sketches, counters = {}, {}
+        for chunk in iter_table(source_path, config.chunk_size):
+            for col in chunk.columns:
+                if chunk[col].dtype == "object":
+                    counters.setdefault(col, Counter()).update(
+                        chunk[col].value_counts().to_dict()
+                    )
+                else:
+                    sketches.setdefault(
+                        col, QuantileSketch(config.sketch_k, config.random_state)
+                    ).update(chunk[col].to_numpy())
+        fill = {}
+        for col, counter in counters.items():
+            if counter:
+                top = max(counter.values())
+                fill[col] = min(v for v, count in counter.items() if count == top)
+        for col, sketch in sketches.items():
+            if col not in counters and sketch.n:
+                fill[col] = sketch.median()
+        return fill, list(counters)
+
+    def hashed_split(self, chunk, categorical_columns):
+        ## Row-content hash keyed by random_state: the same row lands in the same
+        ## file whatever the chunk size, order or number of rows around it.
+        config = self.data_ingestion_config
+        canonical = chunk.astype(
+            {
+                col: "object" if col in categorical_columns else "float64"
+                for col in chunk.columns
+            }
+        )
+        hashes = pd.util.hash_pandas_object(
+            canonical, index=False, hash_key=f"{config.random_state:016d}"[-16:]
+        ).to_numpy()
+        return (hashes >> np.uint64(11)) / float(1 << 53) < config.test_size
+
+    def initiate_streaming_ingestion(self):
+        ## Two bounded-memory passes over the source: fill values first, then
+        ## each chunk is imputed and split into the train and test files.
+        try:
+            config = self.data_ingestion_config
+            logging.info(
+                f"Streaming the source data in chunks of {config.chunk_size}..."
+            )
+            with profile_step("fill_values"):
+                fill, categorical_columns = self.fill_values(config.source_data_path)
+            logging.info(f"Streaming fill values: {fill}")
+
+            with profile_step("impute_split_write"), ChunkWriter(
+                config.train_data_path
+            ) as train_writer, ChunkWriter(config.test_data_path) as test_writer:
+                for chunk in iter_table(config.source_data_path, config.chunk_size):
+                    is_test = self.hashed_split(chunk, categorical_columns)
+                    chunk = chunk.fillna(fill)
+                    train_writer.write(chunk[~is_test])
+                    test_writer.write(chunk[is_test])
+
+            logging.info(
+                f"Streamed {train_writer.rows} train and {test_writer.rows} test rows."
+            )
+            return (config.train_data_path, config.test_data_path)
+
+        except Exception as e:
+            raise CustomException(e, sys)
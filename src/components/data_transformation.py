@@ -2,30 +2,51 @@ import os
 import sys
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+from collections import Counter
 from dataclasses import dataclass
 
 from src.logger import logging
 from src.exception import CustomException
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from src.utils import save_object
+from sklearn.base import clone
+from src.utils import save_object, load_table, iter_table
+from src.profiler import profile_step
+from src.quantile_sketch import QuantileSketch
 
 
 @dataclass
 class DataTransformationConfig:
     preprocessor_path = os.path.join("artifacts", "preprocessor.pkl")
     target_column = "expenses"
+    dtype = "float64"  # "float32" halves the matrices handed to ModelTrainer
+    keep_sparse = False
+    save_arrays = False
+    array_dir = "artifacts"
+    array_names = ("X_train", "y_train", "X_test", "y_test")
+    chunk_size = 100_000  # rows per chunk in streaming mode
+    ## Also build ordinal-coded features for the native categorical candidate.
+    native_categorical = True
+    native_preprocessor_path = os.path.join("artifacts", "native_preprocessor.pkl")
+    native_array_names = ("X_native_train", "X_native_test")
+
+    def array_path(self, name, sparse=False):
+        return os.path.join(self.array_dir, f"{name}.{'npz' if sparse else 'npy'}")
 
 
 class DataTransformation:
     def __init__(self):
         self.data_transformation_config = DataTransformationConfig()
 
-    def get_transformer_object(self):
+    def get_transformer_object(self, data=None):
         try:
-            data = pd.read_csv(os.path.join("artifacts", "data.csv"))
+            ## Column dtypes come from the frame already in memory when given,
+            ## rather than re-reading the whole raw artifact.
+            if data is None:
+                data = pd.read_csv(os.path.join("artifacts", "data.csv"))
             num_columns = []
             cat_columns = []
             for col in data.columns:
@@ -53,7 +74,10 @@ class DataTransformation:
                 transformers=[
                     ("num_pipeline", num_pipeline, num_columns),
                     ("cat_pipeline", cat_pipeline, cat_columns),
-                ]
+                ],
+                sparse_threshold=(
+                    1.0 if self.data_transformation_config.keep_sparse else 0.3
+                ),
             )
             logging.info(num_columns)
             logging.info(cat_columns)
@@ -63,41 +87,198 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys)
 
+    def get_native_transformer_object(self, data):
+        ## Numeric columns pass through (missing values are handled by the model)
+        ## and categories become ordinal codes; unseen categories map to -1, which
+        ## HistGradientBoosting treats as missing.
+        try:
+            target_column = self.data_transformation_config.target_column
+            cat_columns = [col for col in data.columns if data[col].dtype == "object"]
+            num_columns = [
+                col
+                for col in data.columns
+                if col not in cat_columns and target_column not in col
+            ]
+            cat_pipeline = Pipeline(
+                steps=[
+                    (
+                        "ordinal",
+                        OrdinalEncoder(
+                            handle_unknown="use_encoded_value", unknown_value=-1
+                        ),
+                    )
+                ]
+            )
+            preprocessor = ColumnTransformer(
+                transformers=[
+                    ("num_pipeline", "passthrough", num_columns),
+                    ("cat_pipeline", cat_pipeline, cat_columns),
+                ]
+            )
+            categorical_mask = [False] * len(num_columns) + [True] * len(cat_columns)
+            return preprocessor, categorical_mask
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _as_model_input(self, X):
+        ## X and y are handed over separately as C-contiguous arrays in the
+        ## configured dtype, so the estimators do not copy them again; one-hot
+        ## output stays CSR when keep_sparse is set.
+        dtype = np.dtype(self.data_transformation_config.dtype)
+        if sp.issparse(X):
+            return X.tocsr().astype(dtype, copy=False)
+        return np.ascontiguousarray(X, dtype=dtype)
+
+    def _save_array(self, name, arr):
+        ## Dense arrays come back as read-only memory maps of the .npy files.
+        config = self.data_transformation_config
+        os.makedirs(config.array_dir, exist_ok=True)
+        if sp.issparse(arr):
+            sp.save_npz(config.array_path(name, sparse=True), arr)
+            return sp.load_npz(config.array_path(name, sparse=True))
+        np.save(config.array_path(name), arr)
+        return np.load(config.array_path(name), mmap_mode="r")
+
     def initiate_data_transformation(self, train_path, test_path):
         try:
             logging.info("Getting train_path and test_path...")
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            with profile_step("read"):
+                train_df = load_table(train_path)
+                test_df = load_table(test_path)
 
-            preprocessor_obj = self.get_transformer_object()
+            preprocessor_obj = self.get_transformer_object(train_df.head(0))
             target_feature = self.data_transformation_config.target_column
 
             input_feature_train = train_df.drop(target_feature, axis=1)
-            target_feature_train = train_df[target_feature]
             input_feature_test = test_df.drop(target_feature, axis=1)
-            target_feature_test = test_df[target_feature]
+            y_train = np.ascontiguousarray(train_df[target_feature], dtype=np.float64)
+            y_test = np.ascontiguousarray(test_df[target_feature], dtype=np.float64)
 
             logging.info("All datas are going to scale...")
-            input_feature_train_arr = preprocessor_obj.fit_transform(
-                input_feature_train
-            )
-            input_feature_test_arr = preprocessor_obj.transform(input_feature_test)
-            logging.info(f"Scaled data sample: {input_feature_test_arr[0]}")
-            logging.info(f"Number of features: {len(input_feature_test_arr[0])}")
+            with profile_step("transformer_fit"):
+                X_train = self._as_model_input(
+                    preprocessor_obj.fit_transform(input_feature_train)
+                )
+            with profile_step("transform_test"):
+                X_test = self._as_model_input(
+                    preprocessor_obj.transform(input_feature_test)
+                )
+            logging.info(f"Scaled data sample: {X_test[0]}")
+            logging.info(f"Number of features: {X_test.shape[1]}")
 
-            train_arr = np.c_[input_feature_train_arr, target_feature_train]
-            test_arr = np.c_[input_feature_test_arr, target_feature_test]
+            arrays = dict(
+                X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test
+            )
+            categorical_mask = None
+            if self.data_transformation_config.native_categorical:
+                native_obj, categorical_mask = self.get_native_transformer_object(
+                    train_df.head(0)
+                )
+                with profile_step("native_transformer_fit"):
+                    arrays["X_native_train"] = self._as_model_input(
+                        native_obj.fit_transform(input_feature_train)
+                    )
+                    arrays["X_native_test"] = self._as_model_input(
+                        native_obj.transform(input_feature_test)
+                    )
+                save_object(
+                    native_obj, self.data_transformation_config.native_preprocessor_path
+                )
+            if self.data_transformation_config.save_arrays:
+                with profile_step("save_arrays"):
+                    arrays = {
+                        name: self._save_array(name, arr)
+                        for name, arr in arrays.items()
+                    }
 
             logging.info("Saving the transformer object...")
             save_object(
                 preprocessor_obj, self.data_transformation_config.preprocessor_path
             )
 
+            native = None
+            if categorical_mask is not None:
+                native = (
+                    arrays["X_native_train"],
+                    arrays["X_native_test"],
+                    categorical_mask,
+                )
             return (
-                train_arr,
-                test_arr,
+                arrays["X_train"],
+                arrays["y_train"],
+                arrays["X_test"],
+                arrays["y_test"],
                 self.data_transformation_config.preprocessor_path,
+                native,
             )
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def _prototype_frame(self, columns, num_columns, num_fill, vocabularies):
+        ## Smallest frame whose fit yields the streamed statistics: numeric columns
+        ## are constant at their fill value, every category appears at least once
+        ## and the most frequent one fills the remaining rows.
+        n_rows = 2 * max([len(vocab) for vocab in vocabularies.values()] + [1]) + 1
+        data = {col: np.full(n_rows, fill) for col, fill in zip(num_columns, num_fill)}
+        for col, vocab in vocabularies.items():
+            mode = vocab.most_common(1)[0][0]
+            categories = list(vocab)
+            data[col] = categories + [mode] * (n_rows - len(categories))
+        return pd.DataFrame(data)[columns]
+
+    def initiate_streaming_transformation(self, train_path):
+        ## Two passes over the train file, one chunk in memory at a time:
+        ## 1. numeric fill values (median from a quantile sketch, as the median
+        ##    imputer would compute in memory) and a category vocabulary with
+        ##    counts for the most frequent fill,
+        ## 2. StandardScaler.partial_fit on the imputed/encoded chunks.
+        ## The result is the same ColumnTransformer as the in-memory path, so the
+        ## prediction pipeline loads it unchanged.
+        try:
+            config = self.data_transformation_config
+            chunks = iter_table(train_path, config.chunk_size)
+            first = next(chunks)
+            preprocessor = self.get_transformer_object(first.head(0))
+            num_columns = preprocessor.transformers[0][2]
+            cat_columns = preprocessor.transformers[1][2]
+
+            logging.info("Streaming pass 1: fill values and category vocabulary...")
+            sketches = {col: QuantileSketch(random_state=42) for col in num_columns}
+            vocabularies = {col: Counter() for col in cat_columns}
+            n_rows = 0
+            with profile_step("transformer_fit"):
+                for chunk in iter_table(train_path, config.chunk_size):
+                    for col in num_columns:
+                        sketches[col].update(chunk[col].to_numpy())
+                    for col in cat_columns:
+                        vocabularies[col].update(chunk[col].value_counts().to_dict())
+                    n_rows += len(chunk)
+                num_fill = [sketches[col].median() for col in num_columns]
+                columns = [col for col in first.columns if col != config.target_column]
+                preprocessor.fit(
+                    self._prototype_frame(columns, num_columns, num_fill, vocabularies)
+                )
+
+            logging.info("Streaming pass 2: scaler statistics...")
+            pipelines = [
+                (pipeline, columns)
+                for name, pipeline, columns in preprocessor.transformers_
+                if name != "remainder"
+            ]
+            for pipeline, _ in pipelines:
+                name, scaler = pipeline.steps[-1]
+                pipeline.steps[-1] = (name, clone(scaler))
+            with profile_step("scaler_partial_fit"):
+                for chunk in iter_table(train_path, config.chunk_size):
+                    for pipeline, columns in pipelines:
+                        encoded = pipeline[:-1].transform(chunk[columns])
+                        pipeline.steps[-1][1].partial_fit(encoded)
+
+            logging.info(f"Preprocessor fitted on {n_rows} streamed rows.")
+            save_object(preprocessor, config.preprocessor_path)
+            return config.preprocessor_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
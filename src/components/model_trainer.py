@@ -1,46 +1,170 @@
 import os
 import sys
-import pandas as pd
-import numpy as np
 from dataclasses import dataclass
 
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object, get_best_model, finetune_best_model, mlflow_tracking
+from src.utils import save_object, load_object
+from src.profiler import profile_step
+from src.model_bundle import save_bundle, feature_schema
+from src.training_utils import (
+    NATIVE_MODEL,
+    get_best_model,
+    finetune_best_model,
+    mlflow_tracking,
+    ChunkStream,
+    get_best_streaming_model,
+    finetune_streaming_model,
+    mlflow_streaming_tracking,
+)
+from src.components.data_transformation import DataTransformationConfig
 
 
 @dataclass
 class ModelTrainerConfig:
     model_path = os.path.join("artifacts", "model.pkl")
+    bundle_path = os.path.join("artifacts", "model_bundle.bin")
+    n_jobs = -1
+    candidate_time_budget = None
+    trace_memory = False  # tracemalloc peaks per candidate; slows the fits it times
+    chunk_size = 100_000  # rows per chunk in streaming mode
+    streaming_epochs = 3
+    holdout_every = 5  # every 5th train row ranks streaming tuning candidates
 
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config = ModelTrainerConfig()
 
-    def initiate_model_trainer(self, train_arr, test_arr):
+    def save_model_bundle(
+        self, preprocessor, model, model_name, parameters, report, tuned_score
+    ):
+        metadata = {
+            "model_name": model_name,
+            "best_parameters": parameters,
+            "candidate_report": report,
+            "tuned_score": tuned_score,
+            "schema": feature_schema(
+                preprocessor, DataTransformationConfig.target_column
+            ),
+        }
+        with profile_step("save_model_bundle"):
+            header = save_bundle(
+                preprocessor, model, self.model_trainer_config.bundle_path, metadata
+            )
+        logging.info(f"Model bundle saved (sha256 {header['sha256'][:16]}).")
+
+    def save_artifacts(self, preprocessor, model, *bundle_fields):
+        ## Written together once training is done. The bundle, which the
+        ## predictor prefers, is one atomically replaced file and goes first;
+        ## the dill pair follows, so serving never pairs a new preprocessor
+        ## with an old model while finetuning runs.
+        self.save_model_bundle(preprocessor, model, *bundle_fields)
+        save_object(model, self.model_trainer_config.model_path)
+        save_object(preprocessor, DataTransformationConfig.preprocessor_path)
+
+    def initiate_model_trainer(self, X_train, y_train, X_test, y_test, native=None):
         try:
-            X_train = train_arr[:, :-1]
-            X_test = test_arr[:, :-1]
-            y_train = train_arr[:, -1]
-            y_test = test_arr[:, -1]
+            with profile_step("get_best_model"):
+                model_report, best_model_name, best_model, best_score = get_best_model(
+                    X_train,
+                    X_test,
+                    y_train,
+                    y_test,
+                    n_jobs=self.model_trainer_config.n_jobs,
+                    time_budget=self.model_trainer_config.candidate_time_budget,
+                    native=native,
+                    trace_memory=self.model_trainer_config.trace_memory,
+                )
+            logging.info(model_report)
+            logging.info(f"Best_Model: {best_model}, Best_Score: {best_score}")
+
+            preprocessor_path = DataTransformationConfig.preprocessor_path
+            if best_model_name == NATIVE_MODEL:
+                ## The native candidate is scored on ordinal-coded features, so
+                ## its preprocessor replaces the one-hot one for serving.
+                X_train, X_test = native[0], native[1]
+                preprocessor_path = DataTransformationConfig.native_preprocessor_path
+            preprocessor = load_object(preprocessor_path)
 
-            model_report, best_model_name, best_model, best_score = get_best_model(
-                X_train, X_test, y_train, y_test
+            with profile_step("finetune"):
+                best_parameters, tuned_score = finetune_best_model(
+                    X_train, X_test, y_train, y_test, best_model_name, best_model
+                )
+            logging.info(f"Tuned_Model: {best_model}, Tuned_Score: {tuned_score}")
+
+            with profile_step("mlflow_tracking"):
+                mlflow_tracking(
+                    X_train, X_test, y_train, y_test, best_model, best_parameters
+                )
+
+            self.save_artifacts(
+                preprocessor,
+                best_model,
+                best_model_name,
+                best_parameters,
+                model_report[best_model_name],
+                tuned_score,
             )
+            logging.info("Model object has saved.")
+
+            return tuned_score
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_streaming_trainer(self, train_path, test_path, preprocessor_path):
+        ## partial_fit candidates trained over chunked reads of the train file.
+        try:
+            config = self.model_trainer_config
+            preprocessor = load_object(preprocessor_path)
+            target = DataTransformationConfig.target_column
+            train_stream = ChunkStream(
+                train_path,
+                preprocessor,
+                target,
+                config.chunk_size,
+                holdout_every=config.holdout_every,
+            )
+            test_stream = ChunkStream(
+                test_path, preprocessor, target, config.chunk_size
+            )
+
+            with profile_step("get_best_model"):
+                model_report, best_model_name, best_model, best_score = (
+                    get_best_streaming_model(
+                        train_stream,
+                        test_stream,
+                        config.streaming_epochs,
+                        time_budget=config.candidate_time_budget,
+                        trace_memory=config.trace_memory,
+                    )
+                )
             logging.info(model_report)
             logging.info(f"Best_Model: {best_model}, Best_Score: {best_score}")
 
-            best_parameters, tuned_score = finetune_best_model(
-                X_train, X_test, y_train, y_test, best_model_name, best_model
-            )
+            with profile_step("finetune"):
+                best_model, best_parameters, metrics = finetune_streaming_model(
+                    train_stream,
+                    test_stream,
+                    best_model_name,
+                    best_model,
+                    config.streaming_epochs,
+                )
+            tuned_score = metrics[2]
             logging.info(f"Tuned_Model: {best_model}, Tuned_Score: {tuned_score}")
 
-            tracking = mlflow_tracking(
-                X_train, X_test, y_train, y_test, best_model, best_parameters
-            )
+            with profile_step("mlflow_tracking"):
+                mlflow_streaming_tracking(best_model, best_parameters, metrics)
 
-            save_object(best_model, self.model_trainer_config.model_path)
+            self.save_artifacts(
+                preprocessor,
+                best_model,
+                best_model_name,
+                best_parameters,
+                model_report[best_model_name],
+                tuned_score,
+            )
             logging.info("Model object has saved.")
 
             return tuned_score
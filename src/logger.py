@@ -1,7 +1,23 @@
 import os
 import sys
+import queue
+import pickle
+import random
+import socket
+import struct
+import time
+import threading
+import socketserver
 from datetime import datetime
+from dataclasses import dataclass
 import logging
+import logging.handlers
+import multiprocessing.util
+
+try:
+    import fcntl
+except ImportError:  # no flock, and no unix sockets to elect an owner over
+    fcntl = None
 
 FORMAT = "[%(asctime)s] %(levelname)s | %(filename)s | %(lineno)d | %(message)s"
 folder_format = datetime.now().strftime("%d_%b_%Y")
@@ -9,8 +25,251 @@ folder_format = datetime.now().strftime("%d_%b_%Y")
 log_file_name = f"{datetime.now().strftime('%d-%b-%Y_%H-%M-%S')}.log"
 log_file_path = os.path.join(os.getcwd(), "logs", folder_format, log_file_name)
 
-os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
 
-logging.basicConfig(filename=log_file_path, format=FORMAT, level=logging.INFO)
+@dataclass
+class LoggerConfig:
+    ## "file" keeps one synchronous log file per process, "queue" hands records to
+    ## a QueueListener thread that writes a single rotating file.
+    mode = os.getenv("LOG_MODE", "file")
+    level = os.getenv("LOG_LEVEL", "INFO")
+    log_dir = os.getenv("LOG_DIR", os.path.join(os.getcwd(), "logs"))
+    rotation = os.getenv("LOG_ROTATION", "size")  # "size" or "time"
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    rotate_when = os.getenv("LOG_ROTATE_WHEN", "midnight")
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", 7))
+    ## Fraction of INFO/DEBUG hot-path records kept; warnings and errors always pass.
+    hot_path_sample_rate = float(os.getenv("LOG_HOT_PATH_SAMPLE_RATE", 1.0))
+
+
+class HotPathSampler(logging.Filter):
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if not getattr(record, "hot_path", False) or record.levelno >= logging.WARNING:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+
+class StructuredFormatter(logging.Formatter):
+    ## Appends the record's `fields` as key=value pairs so per-request values
+    ## (route, status, latency_ms, rows) can be grepped and parsed.
+    def format(self, record):
+        message = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            message += " | " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return message
+
+
+def hot_path(**fields):
+    return {"hot_path": True, "fields": fields}
+
+
+def _file_handler(config):
+    if config.mode != "queue":
+        os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+        handler = logging.FileHandler(log_file_path)
+    elif config.rotation == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            app_log_path, when=config.rotate_when, backupCount=config.backup_count
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            app_log_path, maxBytes=config.max_bytes, backupCount=config.backup_count
+        )
+    handler.setFormatter(StructuredFormatter(FORMAT))
+    return handler
+
+
+## In queue mode exactly one process owns app.log and is the only one that
+## writes and rotates it: the one bound to app.log.sock. Every other process
+## (forked or spawned workers, a second app next to a training run) sends its
+## records there, in the length-prefixed pickles of SocketHandler.
+class _RecordReceiver(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            while True:
+                header = self.rfile.read(4)
+                if len(header) < 4:
+                    return
+                length = struct.unpack(">L", header)[0]
+                data = self.rfile.read(length)
+                if len(data) < length:
+                    return
+                log_queue.put(logging.makeLogRecord(pickle.loads(data)))
+        finally:
+            self.server.connections.discard(self.connection)
+
+
+class _LogServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, path):
+        self.connections = set()
+        super().__init__(path, _RecordReceiver)
+
+    def process_request(self, request, client_address):
+        self.connections.add(request)
+        super().process_request(request, client_address)
+
+    def server_activate(self):
+        ## Records are unpickled, so only this user may connect.
+        os.chmod(self.server_address, 0o600)
+        super().server_activate()
+
+
+class _OwnerHandler(logging.handlers.SocketHandler):
+    ## Sends to the owner of app.log. If the owner has exited, the election is
+    ## run again and this process may take the file over.
+    def __init__(self, path):
+        super().__init__(path, None)
+
+    def _disconnect(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def emit(self, record):
+        for _ in range(2):
+            try:
+                if self.sock is None:
+                    self.sock = self.makeSocket()
+                self.sock.sendall(self.makePickle(record))
+                return
+            except OSError:
+                self._disconnect()
+                owned = _claim_log_file()
+                if owned is not None:
+                    listener.handlers = (owned,)
+                    owned.handle(record)
+                    return
+        self.handleError(record)
+
+
+def _owner_alive():
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    finally:
+        probe.close()
+
+
+def _claim_log_file():
+    ## Returns app.log's handler if this process now owns the file, None if
+    ## another live process does.
+    global server, server_pid
+    if fcntl is not None:
+        try:
+            with open(lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if _owner_alive():
+                    return None
+                ## Left behind by an owner that died without cleaning up.
+                if os.path.exists(socket_path):
+                    os.unlink(socket_path)
+                server, server_pid = _LogServer(socket_path), os.getpid()
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        except OSError:
+            ## e.g. a log dir too long for a unix socket path; write directly.
+            server = None
+    return _file_handler(config)
+
+
+def _start_listener():
+    global listener
+    sink = _claim_log_file() or _OwnerHandler(socket_path)
+    listener = logging.handlers.QueueListener(
+        log_queue, sink, respect_handler_level=True
+    )
+    listener.start()
+
+
+def _stop_listener():
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
+
+def _release_log_file():
+    ## Done under the election lock, so no client takes app.log over before
+    ## everything sent here is written. Clients' next send fails and they run
+    ## the election again; what they already sent is still read.
+    global server
+    if server is None or server_pid != os.getpid():
+        return
+    with open(lock_path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        server.shutdown()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        for connection in list(server.connections):
+            try:
+                connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        deadline = time.monotonic() + 1.0
+        while server.connections and time.monotonic() < deadline:
+            time.sleep(0.01)
+        _stop_listener()
+    server = None
+
+
+def _shutdown():
+    _release_log_file()
+    _stop_listener()
+    ## Draining may have taken app.log over from an owner that already left.
+    _release_log_file()
+
+
+def _after_fork_in_child():
+    ## A forked child (candidate pool worker, preloaded gunicorn worker) gets a
+    ## fresh queue (the inherited one may still hold parent records) and its
+    ## own listener, which finds the parent serving app.log. An inherited
+    ## listening socket is closed here; it still belongs to the parent.
+    global log_queue, server
+    if server is not None:
+        server.socket.close()
+        server = None
+    log_queue = queue.SimpleQueue()
+    root_handler.queue = log_queue
+    _start_listener()
+
+
+def _shutdown_at_exit(_=None):
+    ## multiprocessing workers leave through os._exit, which skips atexit; exit
+    ## finalizers run in every process (the main one from atexit). Forked
+    ## children start with an empty registry, so they register again.
+    multiprocessing.util.Finalize(None, _shutdown, exitpriority=0)
+
+
+config = LoggerConfig()
+app_log_path = os.path.join(config.log_dir, "app.log")
+socket_path = f"{app_log_path}.sock"
+lock_path = f"{app_log_path}.lock"
+sampler = HotPathSampler(config.hot_path_sample_rate)
+listener = server = server_pid = None
+
+if config.mode == "queue":
+    os.makedirs(config.log_dir, exist_ok=True)
+    log_queue = queue.SimpleQueue()
+    root_handler = logging.handlers.QueueHandler(log_queue)
+    ## QueueHandler.prepare() merges args into the message; formatting with the
+    ## full FORMAT is left to the listener's file handler.
+    root_handler.setFormatter(logging.Formatter("%(message)s"))
+    _start_listener()
+    _shutdown_at_exit()
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+    multiprocessing.util.register_after_fork(config, _shutdown_at_exit)
+else:
+    root_handler = _file_handler(config)
+
+root_handler.addFilter(sampler)
+logging.basicConfig(handlers=[root_handler], level=config.level)
 
 # log = logging.getLogger()
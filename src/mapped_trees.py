@@ -0,0 +1,98 @@
+import numpy as np
+from sklearn.ensemble._hist_gradient_boosting.common import (
+    PREDICTOR_RECORD_DTYPE,
+    X_BITSET_INNER_DTYPE,
+)
+from sklearn.ensemble._hist_gradient_boosting._predictor import (
+    _predict_from_raw_data,
+)
+
+## sklearn's Tree copies its nodes into its own buffer when unpickled, so trees
+## loaded from a bundle could never share pages. Single-output regression trees
+## (forests, AdaBoost) are therefore written in the node layout of the
+## histogram boosting predictor, whose compiled traversal reads a read-only
+## NumPy array, and MappedTree serves them from the mapping.
+
+NO_BITSETS = np.zeros((0, 8), dtype=X_BITSET_INNER_DTYPE)
+
+
+def tree_records(tree):
+    ## Returns (n_features, max_depth, records) for a sklearn Tree, or None when
+    ## the tree has more than one output or class.
+    n_features, n_classes, n_outputs = tree.__reduce__()[1]
+    if n_outputs != 1 or int(np.max(n_classes)) != 1:
+        return None
+    state = tree.__getstate__()
+    nodes = state["nodes"]
+    leaf = nodes["left_child"] == -1
+    records = np.zeros(len(nodes), dtype=PREDICTOR_RECORD_DTYPE)
+    records["value"] = state["values"][:, 0, 0]
+    records["count"] = nodes["n_node_samples"]
+    records["feature_idx"] = np.where(leaf, 0, nodes["feature"])
+    records["num_threshold"] = nodes["threshold"]
+    if "missing_go_to_left" in nodes.dtype.names:
+        records["missing_go_to_left"] = nodes["missing_go_to_left"]
+    records["left"] = np.where(leaf, 0, nodes["left_child"])
+    records["right"] = np.where(leaf, 0, nodes["right_child"])
+    records["is_leaf"] = leaf
+    return n_features, state["max_depth"], records
+
+
+def _dense(X):
+    ## Trees validate X to float32; the compiled traversal reads float64, which
+    ## holds every float32 exactly, so splits fall the same way.
+    if hasattr(X, "toarray"):
+        X = X.toarray()
+    return np.ascontiguousarray(X, dtype=np.float64)
+
+
+class MappedTree:
+    ## Stands in for sklearn's Tree: predict() and apply() as the tree
+    ## estimators call them, over node records that stay in the bundle file.
+    n_outputs = 1
+    max_n_classes = 1
+
+    def __init__(self, n_features, max_depth, buffer, dtype):
+        if np.dtype(dtype) != PREDICTOR_RECORD_DTYPE:
+            raise ValueError("Bundle trees were written by another scikit-learn.")
+        self.n_features = n_features
+        self.max_depth = max_depth
+        self.nodes = np.frombuffer(buffer, dtype=PREDICTOR_RECORD_DTYPE)
+        self.node_count = len(self.nodes)
+        self.n_classes = np.ones(1, dtype=np.intp)
+        self._f_idx_map = np.zeros(n_features, dtype=np.uint32)
+
+    @property
+    def n_leaves(self):
+        return int(self.nodes["is_leaf"].sum())
+
+    @property
+    def value(self):
+        return self.nodes["value"].reshape(-1, 1, 1)
+
+    def predict(self, X):
+        X = _dense(X)
+        out = np.empty(X.shape[0])
+        _predict_from_raw_data(
+            self.nodes, X, NO_BITSETS, NO_BITSETS, self._f_idx_map, 1, out
+        )
+        return out[:, np.newaxis]
+
+    def apply(self, X):
+        X = _dense(X)
+        nodes = self.nodes
+        node = np.zeros(X.shape[0], dtype=np.intp)
+        active = np.arange(X.shape[0]) if self.node_count > 1 else node[:0]
+        while active.size:
+            current = node[active]
+            values = X[active, nodes["feature_idx"][current]]
+            go_left = np.where(
+                np.isnan(values),
+                nodes["missing_go_to_left"][current].astype(bool),
+                values <= nodes["num_threshold"][current],
+            )
+            node[active] = np.where(
+                go_left, nodes["left"][current], nodes["right"][current]
+            )
+            active = active[nodes["is_leaf"][node[active]] == 0]
+        return node
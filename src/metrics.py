@@ -0,0 +1,249 @@
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+## In-process metrics rendered in the Prometheus text format (version 0.0.4).
+## Values are per process: with several gunicorn/uvicorn workers each one
+## reports its own series.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    def __init__(self, name, description="", labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def expose(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    ## Cumulative-bucket histogram (Prometheus layout): counts[i] is the number
+    ## of observations <= buckets[i], the last bucket is +Inf. One series per
+    ## tuple of label values.
+    def __init__(self, name, buckets, description="", labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, *labelvalues):
+        with self._lock:
+            counts, total, count = self._series.get(
+                labelvalues, [[0] * len(self.buckets), 0.0, 0]
+            )
+            counts = list(counts)
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative.append(["+Inf" if bound == float("inf") else bound, running])
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+    def quantile(self, q, *labelvalues):
+        ## Upper bound of the bucket holding the q-th observation.
+        snapshot = self.snapshot(*labelvalues)
+        if snapshot["count"] == 0:
+            return None
+        rank = q * snapshot["count"]
+        for bound, running in snapshot["buckets"]:
+            if running >= rank:
+                return bound
+
+    def expose(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            labelled = sorted(self._series)
+        for labelvalues in labelled:
+            snapshot = self.snapshot(*labelvalues)
+            for bound, running in snapshot["buckets"]:
+                labels = _format_labels(
+                    self.labelnames, labelvalues, [("le", _format_value(bound))]
+                )
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(snapshot['sum'])}")
+            lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def expose(self, *extra):
+        lines = []
+        for metric in list(self.metrics.values()) + list(extra):
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_latency = registry.register(
+    Histogram(
+        "insurance_stage_latency_seconds",
+        LATENCY_BUCKETS,
+        "Time spent in each stage of the prediction path.",
+        labelnames=("stage",),
+    )
+)
+stage_errors = registry.register(
+    Counter(
+        "insurance_stage_errors_total",
+        "Exceptions raised inside a timed stage.",
+        labelnames=("stage",),
+    )
+)
+request_latency = registry.register(
+    Histogram(
+        "insurance_request_latency_seconds",
+        LATENCY_BUCKETS,
+        "End-to-end request latency.",
+        labelnames=("route", "method"),
+    )
+)
+requests_total = registry.register(
+    Counter(
+        "insurance_requests_total",
+        "Requests served, by route and status.",
+        labelnames=("route", "method", "status"),
+    )
+)
+request_errors = registry.register(
+    Counter(
+        "insurance_request_errors_total",
+        "Requests answered with a 5xx status.",
+        labelnames=("route", "method"),
+    )
+)
+
+
+class timed:
+    ## with timed("transform"): ...  -- records the stage latency, and counts
+    ## the stage as failed when the block raises. Costs two perf_counter calls
+    ## and one locked update.
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_latency.observe(time.perf_counter() - self.start, self.stage)
+        if exc_type is not None:
+            stage_errors.inc(self.stage)
+        return False
+
+
+def observe_request(route, method, status, seconds):
+    request_latency.observe(seconds, route, method)
+    requests_total.inc(route, method, str(status))
+    if status >= 500:
+        request_errors.inc(route, method)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = registry.expose().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, host="0.0.0.0"):
+    ## For processes without a web route of their own (Streamlit); started at
+    ## most once per process.
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
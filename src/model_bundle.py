@@ -0,0 +1,189 @@
+import io
+import os
+import sys
+import json
+import mmap
+import time
+import pickle
+import struct
+import hashlib
+
+from src.exception import CustomException
+
+## Single-file artifact holding preprocessor + model + metadata:
+##   MAGIC | header length (u64) | JSON header | pickle (protocol 5) | buffers
+## NumPy arrays are written as out-of-band pickle buffers, 64-byte aligned, and
+## are mapped back from the file on load instead of being copied out of the
+## pickle stream, so processes loading the same bundle share those pages.
+## Regression trees of a page or more are written as MappedTree node records
+## (src.mapped_trees) for the same reason.
+
+MAGIC = b"INSBNDL\x00"
+BUNDLE_FORMAT_VERSION = 2
+ALIGNMENT = 64
+MIN_OUT_OF_BAND_BYTES = 64 * 1024
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def feature_schema(preprocessor, target_column):
+    schema = {"features": list(preprocessor.feature_names_in_), "target": target_column}
+    categories = {}
+    for _, pipeline, columns in preprocessor.transformers_:
+        for step in getattr(pipeline, "steps", []):
+            if hasattr(step[1], "categories_"):
+                for col, values in zip(columns, step[1].categories_):
+                    categories[col] = [str(value) for value in values]
+    schema["categories"] = categories
+    return schema
+
+
+class _BundlePickler(pickle.Pickler):
+    ## Gradient boosting sums its stages in compiled code that needs sklearn's
+    ## own Tree, and trees under a page have no pages of their own to share, so
+    ## both keep the default pickling.
+    def __init__(self, file, buffer_callback):
+        from sklearn.tree._tree import Tree
+        from sklearn.ensemble import GradientBoostingClassifier
+        from sklearn.ensemble import GradientBoostingRegressor
+        from src import mapped_trees
+
+        super().__init__(file, protocol=5, buffer_callback=buffer_callback)
+        self.tree_type = Tree
+        self.boosting_types = (GradientBoostingRegressor, GradientBoostingClassifier)
+        self.mapped_trees = mapped_trees
+        self.native_trees = set()
+        self.tree_buffers = set()
+
+    def reducer_override(self, obj):
+        if isinstance(obj, self.boosting_types) and hasattr(obj, "estimators_"):
+            for estimator in obj.estimators_.ravel():
+                self.native_trees.add(id(estimator.tree_))
+        elif type(obj) is self.tree_type and id(obj) not in self.native_trees:
+            converted = self.mapped_trees.tree_records(obj)
+            if converted is not None and converted[2].nbytes >= mmap.PAGESIZE:
+                n_features, max_depth, records = converted
+                buffer = pickle.PickleBuffer(records)
+                self.tree_buffers.add(id(buffer))
+                args = (n_features, max_depth, buffer, records.dtype)
+                return self.mapped_trees.MappedTree, args
+        return NotImplemented
+
+
+def save_bundle(preprocessor, model, file_path, metadata=None):
+    try:
+        import sklearn
+
+        buffers = []
+
+        def out_of_band(buffer):
+            ## Returning True keeps small arrays inside the pickle stream; tree
+            ## nodes always go out of band, as a forest is many small trees.
+            if (
+                buffer.raw().nbytes < MIN_OUT_OF_BAND_BYTES
+                and id(buffer) not in pickler.tree_buffers
+            ):
+                return True
+            buffers.append(buffer)
+            return False
+
+        stream = io.BytesIO()
+        pickler = _BundlePickler(stream, buffer_callback=out_of_band)
+        pickler.dump({"preprocessor": preprocessor, "model": model})
+        payload = stream.getvalue()
+        raw_buffers = [buffer.raw() for buffer in buffers]
+
+        sha = hashlib.sha256(payload)
+        for raw in raw_buffers:
+            sha.update(raw)
+        header = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sklearn_version": sklearn.__version__,
+            "model_type": type(model).__name__,
+            "sha256": sha.hexdigest(),
+            "metadata": metadata or {},
+            "payload_length": len(payload),
+            "buffers": [],
+        }
+        ## Offsets depend on the header length, which depends on the offsets;
+        ## the buffer table is sized from a first pass with placeholder offsets.
+        header["buffers"] = [[0, raw.nbytes] for raw in raw_buffers]
+        header_length = (
+            len(json.dumps(header, default=str).encode()) + 64 * len(raw_buffers) + 256
+        )
+        offset = len(MAGIC) + 8 + header_length + len(payload)
+        for entry, raw in zip(header["buffers"], raw_buffers):
+            offset += _padding(offset)
+            entry[0] = offset
+            offset += raw.nbytes
+        encoded = json.dumps(header, default=str).encode().ljust(header_length)
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("<Q", header_length))
+            file.write(encoded)
+            file.write(payload)
+            for (entry_offset, _), raw in zip(header["buffers"], raw_buffers):
+                file.write(b"\x00" * (entry_offset - file.tell()))
+                file.write(raw)
+        os.replace(temp_path, file_path)
+        return header
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_bundle_header(file_path):
+    try:
+        with open(file_path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{file_path} is not a model bundle.")
+            (header_length,) = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(header_length))
+        if header["format_version"] > BUNDLE_FORMAT_VERSION:
+            raise ValueError(
+                f"Bundle format {header['format_version']} is newer than this reader."
+            )
+        header["payload_offset"] = len(MAGIC) + 8 + header_length
+        return header
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_bundle(file_path, verify=False):
+    ## Returns (preprocessor, model, header). The arrays stay backed by a
+    ## read-only mmap of the file, which lives as long as they do.
+    try:
+        header = read_bundle_header(file_path)
+        with open(file_path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        start = header["payload_offset"]
+        payload = view[start : start + header["payload_length"]]
+        buffers = [
+            view[offset : offset + length] for offset, length in header["buffers"]
+        ]
+
+        if verify:
+            sha = hashlib.sha256(payload)
+            for buffer in buffers:
+                sha.update(buffer)
+            if sha.hexdigest() != header["sha256"]:
+                raise ValueError(f"{file_path} does not match its sha256.")
+
+        objects = pickle.loads(payload, buffers=buffers)
+        ## Unpickling touched the whole file; dropping those pages keeps them out
+        ## of this process's RSS, and the arrays backed by the file fault back in
+        ## from the shared page cache as they are used.
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_DONTNEED)
+        return objects["preprocessor"], objects["model"], header
+
+    except Exception as e:
+        raise CustomException(e, sys)
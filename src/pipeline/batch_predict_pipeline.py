@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import argparse
+import resource
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import pandas as pd
+
+from src.logger import logging
+from src.exception import CustomException
+from src.pipeline.predict_pipeline import PredictPipeline, CustomBatchData
+
+
+@dataclass
+class BatchPredictConfig:
+    chunk_size = 100000
+    num_workers = os.cpu_count() or 1
+    prediction_column = "predicted_expenses"
+
+
+_worker_pipeline = None
+
+
+def _init_worker():
+    ## Each worker unpickles the artifacts once and reuses them for every chunk.
+    global _worker_pipeline
+    _worker_pipeline = PredictPipeline(use_memo=False)
+    _worker_pipeline.predictor_cache.get()
+
+
+def _score_chunk(chunk, prediction_column):
+    if _worker_pipeline is None:
+        _init_worker()
+    dataframe = CustomBatchData.from_dataframe(chunk).get_data_as_dataframe()
+    chunk[prediction_column] = _worker_pipeline.prediction(dataframe)
+    return chunk
+
+
+def _peak_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    ## ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class BatchPredictPipeline:
+    def __init__(self, chunk_size=None, num_workers=None):
+        self.batch_predict_config = BatchPredictConfig()
+        if chunk_size is not None:
+            self.batch_predict_config.chunk_size = chunk_size
+        if num_workers is not None:
+            self.batch_predict_config.num_workers = num_workers
+
+    def _write(self, chunk, output_path, header):
+        chunk.to_csv(
+            output_path, mode="w" if header else "a", header=header, index=False
+        )
+        return len(chunk)
+
+    def run(self, input_path, output_path):
+        try:
+            config = self.batch_predict_config
+            logging.info(
+                f"Bulk scoring {input_path} -> {output_path} "
+                f"(chunk_size={config.chunk_size}, num_workers={config.num_workers})"
+            )
+            start = time.perf_counter()
+            rows = 0
+            reader = pd.read_csv(input_path, chunksize=config.chunk_size)
+
+            if config.num_workers <= 1:
+                for chunk in reader:
+                    scored = _score_chunk(chunk, config.prediction_column)
+                    rows += self._write(scored, output_path, header=rows == 0)
+            else:
+                ## Keep a bounded FIFO of in-flight chunks: memory stays flat and
+                ## results are written back in input order.
+                max_pending = 2 * config.num_workers
+                pending = deque()
+                with ProcessPoolExecutor(
+                    max_workers=config.num_workers, initializer=_init_worker
+                ) as executor:
+                    for chunk in reader:
+                        pending.append(
+                            executor.submit(
+                                _score_chunk, chunk, config.prediction_column
+                            )
+                        )
+                        if len(pending) >= max_pending:
+                            scored = pending.popleft().result()
+                            rows += self._write(scored, output_path, header=rows == 0)
+                    while pending:
+                        scored = pending.popleft().result()
+                        rows += self._write(scored, output_path, header=rows == 0)
+
+            elapsed = time.perf_counter() - start
+            report = {
+                "rows": rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0,
+                "peak_rss_mb_parent": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+            }
+            if config.num_workers > 1:
+                report["peak_rss_mb_worker"] = round(
+                    _peak_rss_mb(resource.RUSAGE_CHILDREN), 1
+                )
+            logging.info(f"Bulk scoring finished: {report}")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large CSV file in chunks.")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--chunk-size", type=int, default=BatchPredictConfig.chunk_size)
+    parser.add_argument("--workers", type=int, default=BatchPredictConfig.num_workers)
+    args = parser.parse_args()
+
+    report = BatchPredictPipeline(args.chunk_size, args.workers).run(
+        args.input_path, args.output_path
+    )
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,205 @@
+import sys
+import numpy as np
+
+from src.logger import logging
+from src.exception import CustomException
+from src.metrics import timed
+
+
+class CompiledPredictor:
+    ## Flattens the fitted impute -> (onehot) -> scaler ColumnTransformer into NumPy
+    ## arrays so raw (age, sex, bmi, children, smoker, region) rows can be scored
+    ## without pandas or per-call sklearn validation.
+
+    def __init__(self, preprocessor, model):
+        from sklearn.compose import ColumnTransformer
+
+        try:
+            if not isinstance(preprocessor, ColumnTransformer):
+                raise NotImplementedError(
+                    f"Cannot compile preprocessor of type {type(preprocessor).__name__}"
+                )
+            if preprocessor.remainder != "drop":
+                raise NotImplementedError("Only remainder='drop' is supported.")
+
+            self.model = model
+            self.feature_names = list(preprocessor.feature_names_in_)
+            self.n_features = sum(
+                s.stop - s.start for s in preprocessor.output_indices_.values()
+            )
+            self.num_blocks = []
+            self.cat_blocks = []
+            for name, pipeline, columns in preprocessor.transformers_:
+                if name == "remainder" or len(columns) == 0:
+                    continue
+                self._compile_block(
+                    pipeline, columns, preprocessor.output_indices_[name]
+                )
+
+            self.linear = self._is_linear(model)
+            if self.linear:
+                self._fold_linear(model)
+            logging.info(
+                f"Compiled predictor built (linear_fold={self.linear}, "
+                f"n_features={self.n_features})."
+            )
+
+        except NotImplementedError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _compile_block(self, pipeline, columns, out_slice):
+        from sklearn.impute import SimpleImputer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+        if not isinstance(pipeline, Pipeline):
+            raise NotImplementedError(f"Unsupported transformer {pipeline!r}")
+        steps = [step for _, step in pipeline.steps]
+        imputer = next((s for s in steps if isinstance(s, SimpleImputer)), None)
+        encoder = next((s for s in steps if isinstance(s, OneHotEncoder)), None)
+        scaler = next((s for s in steps if isinstance(s, StandardScaler)), None)
+        if len(steps) != sum(s is not None for s in (imputer, encoder, scaler)):
+            raise NotImplementedError(f"Unsupported steps in {pipeline}")
+        if encoder is not None and (
+            encoder.drop_idx_ is not None
+            or getattr(encoder, "_infrequent_enabled", False)
+        ):
+            raise NotImplementedError("OneHotEncoder drop/infrequent is not supported.")
+
+        width = out_slice.stop - out_slice.start
+        offset = np.zeros(width)
+        scale = np.ones(width)
+        if scaler is not None:
+            if scaler.with_mean:
+                offset = np.asarray(scaler.mean_, dtype=np.float64)
+            if scaler.with_std:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        input_index = [self.feature_names.index(col) for col in columns]
+        fill = imputer.statistics_ if imputer is not None else [None] * len(columns)
+        block = {
+            "input_index": input_index,
+            "out": out_slice,
+            "offset": offset,
+            "scale": scale,
+        }
+        if encoder is None:
+            block["fill"] = np.asarray(fill, dtype=np.float64)
+            self.num_blocks.append(block)
+        else:
+            maps = []
+            position = 0
+            for categories, fill_value in zip(encoder.categories_, fill):
+                mapping = {value: position + i for i, value in enumerate(categories)}
+                maps.append((mapping, mapping.get(fill_value)))
+                position += len(categories)
+            block["maps"] = maps
+            block["ignore_unknown"] = encoder.handle_unknown != "error"
+            self.cat_blocks.append(block)
+
+    @staticmethod
+    def _is_linear(model):
+        coef = getattr(model, "coef_", None)
+        return (
+            type(model).__module__.startswith("sklearn.linear_model")
+            and coef is not None
+            and np.ndim(coef) == 1
+            and hasattr(model, "intercept_")
+        )
+
+    def _fold_linear(self, model):
+        ## y = sum(coef * (x - offset) / scale) + b, so the scaling is moved into the
+        ## weights and a constant term; each category becomes a lookup table.
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        intercept = float(model.intercept_)
+        for block in self.num_blocks + self.cat_blocks:
+            block_coef = coef[block["out"]] / block["scale"]
+            block["weights"] = block_coef
+            intercept -= float(np.dot(block_coef, block["offset"]))
+        self.intercept = intercept
+
+    def _columns(self, rows):
+        if isinstance(rows, np.ndarray):
+            if rows.ndim == 1:
+                rows = rows.reshape(1, -1)
+            return [rows[:, i] for i in range(rows.shape[1])]
+        return list(zip(*rows))
+
+    def _codes(self, values, mapping, fill_code, ignore_unknown):
+        codes = np.empty(len(values), dtype=np.intp)
+        for i, value in enumerate(values):
+            code = mapping.get(value)
+            if code is None:
+                if value is None or value != value:
+                    code = fill_code
+                elif ignore_unknown:
+                    code = -1
+                else:
+                    raise ValueError(f"Found unknown category {value!r}")
+            codes[i] = code
+        return codes
+
+    def _numeric(self, columns, block):
+        values = np.array(
+            [columns[i] for i in block["input_index"]], dtype=np.float64
+        ).T
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, block["fill"], values)
+        return values
+
+    def transform(self, rows):
+        try:
+            columns = self._columns(rows)
+            n_rows = len(columns[0])
+            X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+            for block in self.num_blocks:
+                values = self._numeric(columns, block)
+                X[:, block["out"]] = (values - block["offset"]) / block["scale"]
+            for block in self.cat_blocks:
+                onehot = np.zeros((n_rows, block["out"].stop - block["out"].start))
+                for i, (mapping, fill_code) in zip(block["input_index"], block["maps"]):
+                    codes = self._codes(
+                        columns[i], mapping, fill_code, block["ignore_unknown"]
+                    )
+                    known = codes >= 0
+                    onehot[np.nonzero(known)[0], codes[known]] = 1.0
+                X[:, block["out"]] = (onehot - block["offset"]) / block["scale"]
+            return X
+
+        except ValueError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict(self, rows):
+        try:
+            if not self.linear:
+                with timed("transform"):
+                    X = self.transform(rows)
+                with timed("predict"):
+                    return self.model.predict(X)
+
+            ## Folded linear models transform and predict in one pass.
+            with timed("predict"):
+                columns = self._columns(rows)
+                prediction = np.full(len(columns[0]), self.intercept)
+                for block in self.num_blocks:
+                    prediction += self._numeric(columns, block) @ block["weights"]
+                for block in self.cat_blocks:
+                    table = np.append(block["weights"], 0.0)  # index -1 -> unknown
+                    for i, (mapping, fill_code) in zip(
+                        block["input_index"], block["maps"]
+                    ):
+                        codes = self._codes(
+                            columns[i], mapping, fill_code, block["ignore_unknown"]
+                        )
+                        prediction += table[codes]
+                return prediction
+
+        except ValueError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,115 @@
+import sys
+import time
+import asyncio
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.exception import CustomException
+from src.metrics import Histogram
+
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size = 64  # 1 disables batching
+    max_wait_ms = 2.0
+    batch_size_buckets = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+    queue_wait_buckets = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+
+## Collects rows submitted by concurrent requests and scores them in one call:
+## a batch closes when it reaches max_batch_size or max_wait_ms after its first
+## row arrived. Scoring runs in the default executor so the event loop keeps
+## accepting requests meanwhile; each caller awaits its own future.
+class MicroBatcher:
+    def __init__(
+        self,
+        score,
+        max_batch_size=MicroBatcherConfig.max_batch_size,
+        max_wait_ms=MicroBatcherConfig.max_wait_ms,
+    ):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self._worker = None
+        self.batch_size = Histogram(
+            "insurance_micro_batch_size",
+            MicroBatcherConfig.batch_size_buckets,
+            "Rows per micro-batch.",
+        )
+        self.queue_wait = Histogram(
+            "insurance_micro_batch_queue_wait_seconds",
+            MicroBatcherConfig.queue_wait_buckets,
+            "Time a row waited before its batch was scored.",
+        )
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self.queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, row):
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                while len(batch) < self.max_batch_size and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _score_batch(self, rows):
+        ## A bad row must not fail its neighbours: on error each row is scored
+        ## alone and gets its own result or exception.
+        try:
+            return list(self.score(rows))
+        except Exception:
+            results = []
+            for row in rows:
+                try:
+                    results.append(self.score([row])[0])
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self.batch_size.observe(len(batch))
+            for _, _, enqueued in batch:
+                self.queue_wait.observe(started - enqueued)
+            try:
+                results = await loop.run_in_executor(
+                    None, self._score_batch, [row for row, _, _ in batch]
+                )
+            except Exception as e:
+                logging.info(f"Micro-batch scoring failed: {e}")
+                results = [CustomException(e, sys)] * len(batch)
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
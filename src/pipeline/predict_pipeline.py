@@ -1,24 +1,304 @@
 import os
 import sys
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+from dataclasses import dataclass
 
-from src.logger import logging
+from src.logger import logging, hot_path
+from src.metrics import timed
 from src.exception import CustomException
-from src.utils import load_object
+from src.utils import load_object, file_digest
+from src.model_bundle import load_bundle, read_bundle_header
+from src.pipeline.compiled_predictor import CompiledPredictor
+
+
+@dataclass
+class PredictPipelineConfig:
+    preprocessor_path = os.path.join("artifacts", "preprocessor.pkl")
+    model_path = os.path.join("artifacts", "model.pkl")
+    bundle_path = os.path.join("artifacts", "model_bundle.bin")
+    max_batch_size = 10000
+    max_content_length = 16 * 1024 * 1024  # bytes per request body
+    memo_size = 4096
+    memo_bmi_precision = 1
+
+
+## Loads the artifacts once per process. Files are re-hashed only when their
+## mtime/size changes and unpickled again only when the hash changes (retrain).
+## A model bundle, when present, is preferred over the dill pair; its version is
+## the hash stored in its header and its arrays are memory-mapped.
+class PredictorCache:
+    def __init__(self, preprocessor_path, model_path, bundle_path=None):
+        self.preprocessor_path = preprocessor_path
+        self.model_path = model_path
+        self.bundle_path = bundle_path
+        self.source = None
+        self._lock = threading.Lock()
+        self._stat = None
+        ## (preprocessor, model, version), replaced in one assignment so a
+        ## reader never pairs artifacts of two versions during a reload.
+        self._artifacts = (None, None, None)
+        self._compiled = None
+        self.load_count = 0
+        self.last_load_time = 0.0
+        self.total_load_time = 0.0
+        self.access_count = 0
+
+    @property
+    def version(self):
+        return self._artifacts[2]
+
+    def _paths(self):
+        if self.bundle_path is not None and os.path.exists(self.bundle_path):
+            return (self.bundle_path,)
+        return (self.preprocessor_path, self.model_path)
+
+    def _file_stat(self):
+        stat = []
+        for path in self._paths():
+            file_stat = os.stat(path)
+            stat.append((path, file_stat.st_mtime_ns, file_stat.st_size))
+        return tuple(stat)
+
+    def _load(self, file_stat):
+        paths = [entry[0] for entry in file_stat]
+        if len(paths) == 1:
+            version = "bundle-" + read_bundle_header(paths[0])["sha256"][:16]
+        else:
+            version = "-".join(file_digest(path)[:16] for path in paths)
+        if version == self.version:
+            ## Touched but unchanged: only the stat needs refreshing.
+            self._stat = file_stat
+            return
+
+        logging.info("Loading Preprocessor and Model files...")
+        start = time.perf_counter()
+        with timed("load_artifacts"):
+            if len(paths) == 1:
+                preprocessor, model, _ = load_bundle(paths[0])
+                source = "bundle"
+            else:
+                preprocessor = load_object(self.preprocessor_path)
+                model = load_object(self.model_path)
+                source = "pickle"
+        elapsed = time.perf_counter() - start
+
+        self._artifacts = (preprocessor, model, version)
+        self.source = source
+        ## Recorded only once both artifacts loaded, so a failed load (e.g. a
+        ## half-written file during a retrain) is retried on the next call.
+        self._stat = file_stat
+        self._compiled = None
+        self.load_count += 1
+        self.last_load_time = elapsed
+        self.total_load_time += elapsed
+        logging.info(f"Artifacts version {version} loaded in {elapsed:.4f}s.")
+
+    def get(self):
+        try:
+            file_stat = self._file_stat()
+            self.access_count += 1
+            if file_stat != self._stat:
+                with self._lock:
+                    if file_stat != self._stat:
+                        self._load(file_stat)
+            return self._artifacts
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_compiled(self):
+        ## Built lazily once per artifact version; None when the preprocessor
+        ## layout cannot be compiled and callers must use the sklearn path.
+        preprocessor, model, version = self.get()
+        compiled = self._compiled
+        if compiled is None or compiled[0] != version:
+            try:
+                predictor = CompiledPredictor(preprocessor, model)
+            except NotImplementedError as e:
+                logging.info(f"Compiled predictor unavailable: {e}")
+                predictor = None
+            compiled = (version, predictor)
+            self._compiled = compiled
+        return compiled[1]
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "load_count": self.load_count,
+            "access_count": self.access_count,
+            "last_load_time": self.last_load_time,
+            "total_load_time": self.total_load_time,
+        }
+
+
+predictor_cache = PredictorCache(
+    PredictPipelineConfig.preprocessor_path,
+    PredictPipelineConfig.model_path,
+    PredictPipelineConfig.bundle_path,
+)
+
+
+## LRU of predictions keyed on normalized feature tuples; cleared whenever the
+## predictor cache reports a new artifact version.
+class PredictionMemo:
+    def __init__(self, max_size, bmi_precision):
+        self.max_size = max_size
+        self.bmi_precision = bmi_precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _number(value):
+        if value is None:
+            return None
+        value = float(value)
+        return None if value != value else value
+
+    @staticmethod
+    def _category(value):
+        if value is None or (isinstance(value, float) and value != value):
+            return None
+        return str(value).strip().lower()
+
+    def normalize(self, row):
+        age, sex, bmi, children, smoker, region = row
+        bmi = self._number(bmi)
+        return (
+            self._number(age),
+            self._category(sex),
+            None if bmi is None else round(bmi, self.bmi_precision),
+            self._number(children),
+            self._category(smoker),
+            self._category(region),
+        )
+
+    def sync(self, version):
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    if self._entries:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self.version = version
+
+    def lookup(self, keys):
+        results = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(value)
+        return results
+
+    def store(self, keys, values):
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = float(value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+prediction_memo = PredictionMemo(
+    PredictPipelineConfig.memo_size, PredictPipelineConfig.memo_bmi_precision
+)
 
 
 class PredictPipeline:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, use_memo=True) -> None:
+        self.predictor_cache = predictor_cache
+        self.prediction_memo = prediction_memo if use_memo else None
+
+    def _score_frame(self, dataframe):
+        preprocessor, model, _ = self.predictor_cache.get()
+        with timed("transform"):
+            scaled_data = preprocessor.transform(dataframe)
+        with timed("predict"):
+            return model.predict(scaled_data)
+
+    def _score_rows(self, rows):
+        compiled = self.predictor_cache.get_compiled()
+        if compiled is None:
+            return self._score_frame(
+                pd.DataFrame(rows, columns=CustomBatchData.feature_columns)
+            )
+        return compiled.predict(rows)
+
+    def _memoized(self, rows, score):
+        memo = self.prediction_memo
+        memo.sync(self.predictor_cache.get()[2])
+
+        keys = [memo.normalize(row) for row in rows]
+        results = memo.lookup(keys)
+        missing = [i for i, value in enumerate(results) if value is None]
+        if missing:
+            ## Misses are scored on their normalized key so a cached value never
+            ## depends on which unrounded bmi happened to arrive first.
+            miss_keys = list(dict.fromkeys(keys[i] for i in missing))
+            miss_rows = [
+                tuple(np.nan if value is None else value for value in key)
+                for key in miss_keys
+            ]
+            scored = score(miss_rows)
+            memo.store(miss_keys, scored)
+            scored = dict(zip(miss_keys, scored))
+            for i in missing:
+                results[i] = scored[keys[i]]
+        return np.asarray(results, dtype=np.float64)
 
     def prediction(self, dataframe):
         try:
-            logging.info("Loading Preprocessor and Model files...")
-            preprocessor = load_object(os.path.join("artifacts", "preprocessor.pkl"))
-            model = load_object(os.path.join("artifacts", "model.pkl"))
-            scaled_data = preprocessor.transform(dataframe)
-            prediction = model.predict(scaled_data)
-            logging.info("Finally Predicted!")
+            if self.prediction_memo is None:
+                prediction = self._score_frame(dataframe)
+            else:
+                rows = dataframe[CustomBatchData.feature_columns].itertuples(
+                    index=False, name=None
+                )
+                prediction = self._memoized(
+                    rows,
+                    lambda miss_rows: self._score_frame(
+                        pd.DataFrame(miss_rows, columns=CustomBatchData.feature_columns)
+                    ),
+                )
+            logging.info("Finally Predicted!", extra=hot_path(rows=len(prediction)))
+            return prediction
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def fast_prediction(self, rows):
+        ## rows: sequence of (age, sex, bmi, children, smoker, region) tuples.
+        try:
+            if self.prediction_memo is None:
+                prediction = self._score_rows(rows)
+            else:
+                prediction = self._memoized(rows, self._score_rows)
+            logging.info("Finally Predicted!", extra=hot_path(rows=len(prediction)))
             return prediction
 
         except Exception as e:
@@ -36,16 +316,122 @@ class CustomData:
 
     def get_data_as_dataframe(self):
         try:
-            input_dict = {
-                "age": [self.age],
-                "sex": [self.sex],
-                "bmi": [self.bmi],
-                "children": [self.children],
-                "smoker": [self.smoker],
-                "region": [self.region],
-            }
-            logging.info("Creating Dataframe...")
-            return pd.DataFrame(data=input_dict)
+            with timed("get_data_as_dataframe"):
+                input_dict = {
+                    "age": [self.age],
+                    "sex": [self.sex],
+                    "bmi": [self.bmi],
+                    "children": [self.children],
+                    "smoker": [self.smoker],
+                    "region": [self.region],
+                }
+                logging.info("Creating Dataframe...", extra=hot_path())
+                return pd.DataFrame(data=input_dict)
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def get_data_as_row(self):
+        return (self.age, self.sex, self.bmi, self.children, self.smoker, self.region)
+
+
+class CustomBatchData:
+    feature_columns = ["age", "sex", "bmi", "children", "smoker", "region"]
+    numeric_columns = ["age", "bmi", "children"]
+    categories = {
+        "sex": ["male", "female"],
+        "smoker": ["yes", "no"],
+        "region": ["northeast", "northwest", "southeast", "southwest"],
+    }
+
+    def __init__(self, records, max_batch_size=PredictPipelineConfig.max_batch_size):
+        if isinstance(records, dict):
+            records = records.get("records")
+        if not isinstance(records, list) or not records:
+            raise ValueError("Expected a non-empty list of records.")
+        if len(records) > max_batch_size:
+            raise ValueError(
+                f"Batch of {len(records)} records exceeds max_batch_size={max_batch_size}."
+            )
+        bad_rows = [
+            i for i, record in enumerate(records) if not isinstance(record, dict)
+        ]
+        if bad_rows:
+            raise ValueError(
+                f"Records must be JSON objects (row indices): {bad_rows[:10]}"
+            )
+        self.data = pd.DataFrame.from_records(records)
+
+    @classmethod
+    def from_csv(cls, file, max_batch_size=PredictPipelineConfig.max_batch_size):
+        ## Parse one row past the limit only, so oversized uploads stay bounded.
+        data = pd.read_csv(file, nrows=max_batch_size + 1)
+        if len(data) > max_batch_size:
+            raise ValueError(f"Batch exceeds max_batch_size={max_batch_size}.")
+        return cls.from_dataframe(data)
+
+    @classmethod
+    def validate_record(cls, record):
+        ## The checks of get_data_as_dataframe for a single record, without a
+        ## DataFrame per call; returns the normalized row in feature order.
+        row, errors = [], []
+        for col in cls.feature_columns:
+            value = record.get(col)
+            if value is None or (isinstance(value, float) and value != value):
+                ## Missing, as in the batch path: left to the imputers.
+                row.append(np.nan if col in cls.numeric_columns else None)
+            elif col in cls.numeric_columns:
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = np.nan
+                if value != value:
+                    errors.append(col)
+                row.append(value)
+            else:
+                value = str(value).strip().lower()
+                if value not in cls.categories[col]:
+                    errors.append(col)
+                row.append(value)
+        if errors:
+            raise ValueError(f"Invalid values for: {', '.join(errors)}")
+        return tuple(row)
+
+    @classmethod
+    def from_dataframe(cls, data):
+        batch = cls.__new__(cls)
+        batch.data = data
+        return batch
+
+    def get_data_as_dataframe(self):
+        missing = [col for col in self.feature_columns if col not in self.data.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        if self.data.empty:
+            raise ValueError("Expected a non-empty list of records.")
+
+        dataframe = self.data[self.feature_columns].copy()
+        errors = {}
+        ## Missing values are left as NaN for the preprocessor's imputers; only
+        ## values that are present but unparsable or unknown are rejected.
+        for col in self.numeric_columns:
+            present = dataframe[col].notna()
+            dataframe[col] = pd.to_numeric(dataframe[col], errors="coerce").astype(
+                "float64"
+            )
+            bad_rows = dataframe.index[present & dataframe[col].isna()].tolist()
+            if bad_rows:
+                errors[col] = bad_rows[:10]
+        for col, allowed in self.categories.items():
+            present = dataframe[col].notna()
+            dataframe[col] = dataframe[col].where(
+                ~present, dataframe[col].astype(str).str.strip().str.lower()
+            )
+            bad_rows = dataframe.index[present & ~dataframe[col].isin(allowed)].tolist()
+            if bad_rows:
+                errors[col] = bad_rows[:10]
+        if errors:
+            raise ValueError(f"Invalid values (column: row indices): {errors}")
+
+        logging.info("Validated batch.", extra=hot_path(rows=len(dataframe)))
+        return dataframe
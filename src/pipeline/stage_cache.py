@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import inspect
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.exception import CustomException
+from src.utils import file_digest, save_object, load_object
+
+
+@dataclass
+class StageCacheConfig:
+    cache_dir = os.path.join("artifacts", "cache")
+    max_entries_per_stage = 3
+
+
+def config_values(config):
+    return {
+        key: value
+        for key, value in vars(type(config)).items()
+        if not key.startswith("_") and not callable(value)
+    }
+
+
+class StageCache:
+    def __init__(
+        self,
+        cache_dir=StageCacheConfig.cache_dir,
+        max_entries=StageCacheConfig.max_entries_per_stage,
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def fingerprint(
+        self, stage, files=(), config=None, code=(), upstream=None, extra=None
+    ):
+        ## Content address of a stage: its input files, config values, the source
+        ## of the code that runs it and the key of the stage feeding it.
+        try:
+            payload = {
+                "stage": stage,
+                "files": {path: file_digest(path) for path in files},
+                "config": config_values(config) if config is not None else {},
+                "code": {
+                    obj.__name__: hashlib.sha256(
+                        inspect.getsource(obj).encode()
+                    ).hexdigest()
+                    for obj in code
+                },
+                "upstream": upstream,
+            }
+            ## Only added when set, so existing keys stay valid.
+            if extra is not None:
+                payload["extra"] = extra
+            encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+            return hashlib.sha256(encoded).hexdigest()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _entry_dir(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def restore(self, stage, key, outputs):
+        entry_dir = self._entry_dir(stage, key)
+        meta_path = os.path.join(entry_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+            for index, path in enumerate(outputs):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                shutil.copyfile(
+                    os.path.join(entry_dir, f"output_{index}"), f"{path}.tmp"
+                )
+                os.replace(f"{path}.tmp", path)
+            meta["result"] = load_object(os.path.join(entry_dir, "result.pkl"))
+            ## Entries are evicted least recently used first.
+            os.utime(meta_path)
+            return meta
+
+        except Exception as e:
+            logging.info(f"Stage cache entry {stage}/{key} unusable: {e}")
+            return None
+
+    def store(self, stage, key, outputs, result, elapsed):
+        try:
+            entry_dir = self._entry_dir(stage, key)
+            os.makedirs(entry_dir, exist_ok=True)
+            for index, path in enumerate(outputs):
+                shutil.copyfile(path, os.path.join(entry_dir, f"output_{index}"))
+            save_object(result, os.path.join(entry_dir, "result.pkl"))
+            ## meta.json is written last: its presence marks a complete entry.
+            with open(os.path.join(entry_dir, "meta.json"), "w") as file:
+                json.dump({"elapsed": elapsed, "outputs": list(outputs)}, file)
+            self.prune(stage)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def prune(self, stage):
+        ## Keeps the max_entries most recently used complete entries of a stage.
+        ## Entries without meta.json may still be being written and are left.
+        stage_dir = os.path.join(self.cache_dir, stage)
+        entries = []
+        for key in os.listdir(stage_dir):
+            meta_path = os.path.join(stage_dir, key, "meta.json")
+            try:
+                entries.append((os.path.getmtime(meta_path), key))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        for _, key in entries[self.max_entries :]:
+            shutil.rmtree(os.path.join(stage_dir, key), ignore_errors=True)
+            logging.info(f"Stage {stage}: evicted cache entry ({key[:12]})")
+
+    def run(self, stage, key, outputs, func, force=False):
+        start = time.perf_counter()
+        meta = None if force else self.restore(stage, key, outputs)
+        if meta is not None:
+            elapsed = time.perf_counter() - start
+            report = {
+                "status": "hit",
+                "seconds": round(elapsed, 3),
+                "saved_seconds": round(max(meta["elapsed"] - elapsed, 0.0), 3),
+            }
+            logging.info(f"Stage {stage}: cache hit ({key[:12]}) {report}")
+            return meta["result"], report
+
+        result = func()
+        elapsed = time.perf_counter() - start
+        self.store(stage, key, outputs, result, elapsed)
+        report = {"status": "miss", "seconds": round(elapsed, 3), "saved_seconds": 0.0}
+        logging.info(f"Stage {stage}: cache miss ({key[:12]}) {report}")
+        return result, report
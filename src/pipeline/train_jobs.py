@@ -0,0 +1,121 @@
+import sys
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.exception import CustomException
+
+
+@dataclass
+class TrainJobConfig:
+    max_jobs_kept = 20
+
+
+class TrainJob:
+    def __init__(self, force=False):
+        ## Imported on first use: TrainPipeline brings in sklearn ensembles and
+        ## mlflow, which the serving processes that import this module never need.
+        from src.pipeline.train_pipeline import TrainPipeline
+
+        self.job_id = uuid.uuid4().hex[:12]
+        self.force = force
+        self.status = "queued"
+        self.stage = None
+        self.stages = {stage: "pending" for stage in TrainPipeline.stages}
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def progress(self):
+        done = sum(status in ("hit", "miss") for status in self.stages.values())
+        return round(done / len(self.stages), 2)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": dict(self.stages),
+            "progress": self.progress,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+## Runs TrainPipeline on a single background thread. A submission made while a
+## job is queued or running is coalesced into that job instead of starting a
+## second, concurrent training run.
+class TrainJobManager:
+    def __init__(self, max_jobs_kept=TrainJobConfig.max_jobs_kept):
+        self.max_jobs_kept = max_jobs_kept
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="train")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._active = None
+
+    def submit(self, force=False):
+        with self._lock:
+            if self._active is not None and self._active.status in (
+                "queued",
+                "running",
+            ):
+                logging.info(
+                    f"Training request coalesced into job {self._active.job_id}"
+                )
+                return self._active, False
+
+            job = TrainJob(force=force)
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs_kept:
+                self._jobs.popitem(last=False)
+            self._active = job
+            self._executor.submit(self._run, job)
+            logging.info(f"Training job {job.job_id} submitted.")
+            return job, True
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def latest(self):
+        return self._active
+
+    def _on_stage(self, job, stage, status):
+        job.stage = stage
+        job.stages[stage] = status
+
+    def _run(self, job):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            from src.pipeline.train_pipeline import TrainPipeline
+
+            train = TrainPipeline(
+                progress_callback=lambda stage, status: self._on_stage(
+                    job, stage, status
+                )
+            )
+            tuned_score = train.run_pipeline(force=job.force)
+            job.result = {
+                "tuned_score": tuned_score,
+                "accuracy": str(round(tuned_score, 2) * 100)[:2],
+                "stage_report": train.stage_report,
+            }
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(CustomException(e, sys))
+            job.status = "failed"
+            logging.info(f"Training job {job.job_id} failed: {job.error}")
+        finally:
+            job.finished_at = time.time()
+
+
+train_job_manager = TrainJobManager()
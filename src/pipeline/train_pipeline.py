@@ -1,51 +1,241 @@
 import os
 import sys
+import argparse
+import numpy as np
+import scipy.sparse as sp
 from src.logger import logging
 from src.exception import CustomException
-from src.components.data_ingestion import DataIngestion
-from src.components.data_transformation import DataTransformation
-from src.components.model_trainer import ModelTrainer
+from src.components import data_ingestion, data_transformation, model_trainer
+from src.components.data_ingestion import DataIngestion, DataIngestionConfig
+from src.components.data_transformation import (
+    DataTransformation,
+    DataTransformationConfig,
+)
+from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
+from src.pipeline.stage_cache import StageCache
+from src.profiler import TrainingProfiler, ProfilerConfig, profile_step, summary_table
+from src import utils, training_utils, quantile_sketch
 
 
 class TrainPipeline:
-    def __init__(self) -> None:
-        pass
+    stages = ("data_ingestion", "data_transformation", "model_trainer")
+
+    def __init__(self, progress_callback=None, streaming=False, profile=False) -> None:
+        self.stage_cache = StageCache()
+        self.stage_report = {}
+        self.force = False
+        self.progress_callback = progress_callback
+        ## Streaming reads every stage's input in chunks and trains partial_fit
+        ## models, for data that does not fit in memory.
+        self.streaming = streaming
+        self.mode = {"streaming": True} if streaming else None
+        ## Profiling records time and memory per stage and sub-step into
+        ## ProfilerConfig.report_path; cached stages show up as a single line.
+        self.profile = profile
+        self.trace_memory = ProfilerConfig.trace_memory
+        self.profile_report = None
+
+    def _notify(self, stage, status):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, status)
 
     def start_data_ingestion(self):
         try:
             logging.info("Data ingestion started.")
-            obj1 = DataIngestion()
-            self.train_data, self.test_data = obj1.initiate_data_ingestion()
+            config = DataIngestionConfig()
+            self.ingestion_key = self.stage_cache.fingerprint(
+                "data_ingestion",
+                files=[config.source_data_path],
+                config=config,
+                code=[data_ingestion, utils.missing_treatment, quantile_sketch],
+                extra=self.mode,
+            )
+            outputs = [config.train_data_path, config.test_data_path]
+            if not self.streaming:
+                outputs.insert(0, config.raw_data_path)
+
+            def run():
+                obj1 = DataIngestion()
+                if self.streaming:
+                    return obj1.initiate_streaming_ingestion()
+                return obj1.initiate_data_ingestion()
+
+            (self.train_data, self.test_data), self.stage_report["data_ingestion"] = (
+                self.stage_cache.run(
+                    "data_ingestion", self.ingestion_key, outputs, run, self.force
+                )
+            )
         except Exception as e:
             raise CustomException(e, sys)
 
     def start_data_transformation(self):
         try:
             logging.info("Data transformation started.")
-            obj2 = DataTransformation()
-            self.train_arr, self.test_arr, _ = obj2.initiate_data_transformation(
-                self.train_data, self.test_data
+            config = DataTransformationConfig()
+            self.transformation_key = self.stage_cache.fingerprint(
+                "data_transformation",
+                files=[self.train_data, self.test_data],
+                config=config,
+                code=[data_transformation, quantile_sketch],
+                upstream=self.ingestion_key,
+                extra=self.mode,
+            )
+
+            def run():
+                obj2 = DataTransformation()
+                if self.streaming:
+                    ## Nothing is materialised; the trainer streams the files.
+                    preprocessor_path = obj2.initiate_streaming_transformation(
+                        self.train_data
+                    )
+                    return (None, None, None, None, preprocessor_path, None)
+                result = obj2.initiate_data_transformation(
+                    self.train_data, self.test_data
+                )
+                if config.save_arrays:
+                    ## The array files are cached as outputs; memmaps stay out of
+                    ## the pickled stage result.
+                    native = result[5]
+                    if native is not None:
+                        native = (None, None, native[2])
+                    return (None, None, None, None, result[4], native)
+                return result
+
+            outputs = [config.preprocessor_path]
+            if config.native_categorical and not self.streaming:
+                outputs.append(config.native_preprocessor_path)
+            if config.save_arrays and not self.streaming:
+                outputs += [
+                    config.array_path(name, sparse=config.keep_sparse and "X" in name)
+                    for name in config.array_names
+                ]
+                if config.native_categorical:
+                    outputs += [config.array_path(n) for n in config.native_array_names]
+            (
+                self.X_train,
+                self.y_train,
+                self.X_test,
+                self.y_test,
+                self.preprocessor_path,
+                self.native,
+            ), self.stage_report["data_transformation"] = self.stage_cache.run(
+                "data_transformation",
+                self.transformation_key,
+                outputs,
+                run,
+                self.force,
             )
+            if config.save_arrays and not self.streaming:
+                for name in config.array_names:
+                    if config.keep_sparse and "X" in name:
+                        arr = sp.load_npz(config.array_path(name, sparse=True))
+                    else:
+                        arr = np.load(config.array_path(name), mmap_mode="r")
+                    setattr(self, name, arr)
+                if self.native is not None:
+                    self.native = tuple(
+                        np.load(config.array_path(name), mmap_mode="r")
+                        for name in config.native_array_names
+                    ) + (self.native[2],)
         except Exception as e:
             raise CustomException(e, sys)
 
     def start_model_trainer(self):
         try:
             logging.info("Model trainer started.")
-            obj3 = ModelTrainer()
-            self.tuned_score = obj3.initiate_model_trainer(
-                self.train_arr, self.test_arr
+            config = ModelTrainerConfig()
+            trainer_key = self.stage_cache.fingerprint(
+                "model_trainer",
+                files=[os.path.join("config", "params.yaml")],
+                config=config,
+                code=[model_trainer, utils, training_utils],
+                upstream=self.transformation_key,
+                extra=self.mode,
+            )
+
+            def run():
+                obj3 = ModelTrainer()
+                if self.streaming:
+                    return obj3.initiate_streaming_trainer(
+                        self.train_data, self.test_data, self.preprocessor_path
+                    )
+                return obj3.initiate_model_trainer(
+                    self.X_train,
+                    self.y_train,
+                    self.X_test,
+                    self.y_test,
+                    native=self.native,
+                )
+
+            ## The trainer swaps in the native preprocessor when that candidate
+            ## wins, so the serving preprocessor is cached with the model.
+            outputs = [
+                config.model_path,
+                config.bundle_path,
+                DataTransformationConfig.preprocessor_path,
+            ]
+            self.tuned_score, self.stage_report["model_trainer"] = self.stage_cache.run(
+                "model_trainer", trainer_key, outputs, run, self.force
             )
         except Exception as e:
             raise CustomException(e, sys)
 
-    def run_pipeline(self):
+    def _run_stages(self):
+        for stage, start_stage in zip(
+            self.stages,
+            (
+                self.start_data_ingestion,
+                self.start_data_transformation,
+                self.start_model_trainer,
+            ),
+        ):
+            self._notify(stage, "running")
+            with profile_step(stage) as step:
+                start_stage()
+                step["cache"] = self.stage_report[stage]["status"]
+            self._notify(stage, self.stage_report[stage]["status"])
+
+    def run_pipeline(self, force=False):
         try:
-            self.start_data_ingestion()
-            self.start_data_transformation()
-            self.start_model_trainer()
+            self.force = force
+            self.stage_report = {}
+            if self.profile:
+                profiler = TrainingProfiler(trace_memory=self.trace_memory)
+                with profiler:
+                    self._run_stages()
+                self.profile_report = profiler.report()
+                report_path = profiler.write(ProfilerConfig.report_path)
+                logging.info(
+                    f"Training profile saved to {report_path}:\n"
+                    f"{summary_table(self.profile_report)}"
+                )
+            else:
+                self._run_stages()
+            saved = sum(stage["saved_seconds"] for stage in self.stage_report.values())
+            logging.info(f"Stage report: {self.stage_report} | saved {saved:.2f}s")
             logging.info("Model Training completed successfully.")
             return self.tuned_score
 
         except Exception as e:
             raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    ## python -m src.pipeline.train_pipeline --profile --force
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true", help="ignore the stage cache")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument(
+        "--no-trace-memory",
+        action="store_true",
+        help="profile without tracemalloc (RSS only), keeping wall times realistic",
+    )
+    args = parser.parse_args()
+
+    pipeline = TrainPipeline(streaming=args.streaming, profile=args.profile)
+    pipeline.trace_memory = not args.no_trace_memory
+    print(f"Tuned score: {pipeline.run_pipeline(force=args.force)}")
+    if pipeline.profile_report is not None:
+        print(summary_table(pipeline.profile_report))
+        print(f"Report: {ProfilerConfig.report_path}")
@@ -0,0 +1,375 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import threading
+import tracemalloc
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+from src.exception import CustomException
+
+
+@dataclass
+class ProfilerConfig:
+    report_path = os.path.join("artifacts", "train_profile.json")
+    trace_memory = True  # tracemalloc roughly doubles wall time of a training run
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return None
+
+
+def _max_rss_mb():
+    ## ru_maxrss is KiB on Linux and bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+## Python 3.8 has no tracemalloc.reset_peak(); there the trace is restarted to
+## reset the peak, and the size traced before the restart is carried in this
+## offset so readings stay comparable (frees of those older blocks are lost).
+_trace_offset = 0
+
+
+def _start_tracing():
+    global _trace_offset
+    _trace_offset = 0
+    tracemalloc.start()
+
+
+def _traced_memory():
+    current, peak = tracemalloc.get_traced_memory()
+    return current + _trace_offset, peak + _trace_offset
+
+
+def _reset_traced_peak():
+    global _trace_offset
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+        return
+    current = _traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    _trace_offset = current
+
+
+class PeakRss:
+    ## RSS high-water mark above the value at entry, sampled on a daemon thread.
+    ## Unlike tracemalloc it does not slow the measured code down, but it also
+    ## counts native buffers and can miss spikes shorter than the interval.
+    source = "rss"
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = None
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self._max = max(self._max, _rss_mb())
+
+    def __enter__(self):
+        self._start = _rss_mb()
+        self._thread = None
+        if self._start is not None:
+            self._max = self._start
+            self._done = threading.Event()
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._done.set()
+            self._thread.join()
+            self.peak_mb = max(self._max, _rss_mb()) - self._start
+        return False
+
+
+class TracedPeak:
+    ## tracemalloc peak above the traced size at entry. A trace that is already
+    ## running (a profiled run) is reused and left running.
+    source = "tracemalloc"
+
+    def __init__(self):
+        self.peak_mb = None
+
+    def __enter__(self):
+        self._owns_trace = not tracemalloc.is_tracing()
+        if self._owns_trace:
+            _start_tracing()
+        reset_peak()
+        self._baseline = _traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        _, peak = _traced_memory()
+        if self._owns_trace:
+            tracemalloc.stop()
+        self.peak_mb = (peak - self._baseline) / (1024 * 1024)
+        return False
+
+
+def _children_cpu():
+    ## Only children that have been waited for are counted (candidate processes
+    ## once joined, pool workers after shutdown); persistent joblib workers are not.
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class _Step:
+    __slots__ = (
+        "profiler",
+        "record",
+        "start",
+        "cpu",
+        "children_cpu",
+        "peak",
+        "traced_start",
+    )
+
+    def __init__(self, profiler, record):
+        self.profiler = profiler
+        self.record = record
+        self.peak = 0
+
+    def __enter__(self):
+        self.profiler._fold_peak()
+        self.profiler._stack.append(self)
+        self.traced_start = _traced_memory()[0]
+        self.record["rss_start_mb"] = _rss_mb()
+        self.children_cpu = _children_cpu()
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self.record
+        record["wall_s"] = time.perf_counter() - self.start
+        record["cpu_s"] = time.process_time() - self.cpu
+        record["children_cpu_s"] = _children_cpu() - self.children_cpu
+        self.profiler._fold_peak()
+        self.profiler._stack.pop()
+        if tracemalloc.is_tracing():
+            ## Peak above what was already allocated when the step started, the
+            ## same measure candidates report from worker processes.
+            record["traced_peak_mb"] = (self.peak - self.traced_start) / (1024 * 1024)
+        record["rss_end_mb"] = _rss_mb()
+        record["max_rss_mb"] = _max_rss_mb()
+        record["status"] = "error" if exc_type is not None else "ok"
+        return False
+
+
+## Records wall time, CPU time, tracemalloc peak and RSS for nested steps of a
+## training run. Code deeper in the pipeline marks its steps with
+## profile_step(name), which is a no-op unless a profiler is running in this
+## process, so the instrumentation can stay in place.
+class TrainingProfiler:
+    def __init__(self, trace_memory=ProfilerConfig.trace_memory):
+        self.trace_memory = trace_memory
+        self.steps = []
+        self._stack = []
+        self._owns_trace = False
+        self.pid = os.getpid()
+
+    def start(self):
+        global _active
+        if self.trace_memory and not tracemalloc.is_tracing():
+            _start_tracing()
+            self._owns_trace = True
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.wall_s = self.cpu_s = None
+        _active = self
+        return self
+
+    def stop(self):
+        global _active
+        self.wall_s = time.perf_counter() - self.start_wall
+        self.cpu_s = time.process_time() - self.start_cpu
+        if self._owns_trace:
+            tracemalloc.stop()
+            self._owns_trace = False
+        if _active is self:
+            _active = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _fold_peak(self):
+        ## tracemalloc keeps one peak; before it is reset for a new step, the
+        ## peak so far is credited to every step still open.
+        if not tracemalloc.is_tracing():
+            return
+        _, peak = _traced_memory()
+        for step in self._stack:
+            step.peak = max(step.peak, peak)
+        _reset_traced_peak()
+
+    def _new_record(self, name):
+        parents = [step.record["name"] for step in self._stack]
+        record = {
+            "name": name,
+            "path": "/".join(parents + [name]),
+            "depth": len(parents),
+        }
+        self.steps.append(record)
+        return record
+
+    def step(self, name):
+        return _Step(self, self._new_record(name))
+
+    def record(self, name, **fields):
+        ## For work measured elsewhere, e.g. candidates fitted in worker processes.
+        record = self._new_record(name)
+        record.update(fields)
+        return record
+
+    def report(self):
+        return {
+            "meta": {
+                "started_at": self.started_at,
+                "wall_s": self.wall_s,
+                "cpu_s": self.cpu_s,
+                "max_rss_mb": _max_rss_mb(),
+                "trace_memory": self.trace_memory,
+                "python": platform.python_version(),
+                "cpu_count": os.cpu_count(),
+                "pid": self.pid,
+            },
+            "steps": self.steps,
+        }
+
+    def write(self, file_path=ProfilerConfig.report_path):
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "w") as file:
+                json.dump(self.report(), file, indent=2, default=str)
+            return file_path
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+_active = None
+
+
+def active_profiler():
+    profiler = _active
+    if profiler is None or profiler.pid != os.getpid():
+        return None
+    return profiler
+
+
+def profile_step(name):
+    profiler = active_profiler()
+    if profiler is None:
+        return nullcontext({})
+    return profiler.step(name)
+
+
+def record_step(name, **fields):
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.record(name, **fields)
+
+
+def reset_peak():
+    ## tracemalloc.reset_peak() that does not lose the peak of open steps.
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler._fold_peak()
+    elif tracemalloc.is_tracing():
+        _reset_traced_peak()
+
+
+def _cell(value, fmt):
+    return "-" if value is None else format(value, fmt)
+
+
+def summary_table(report):
+    total = report["meta"]["wall_s"] or sum(
+        step.get("wall_s") or 0 for step in report["steps"] if step["depth"] == 0
+    )
+    lines = [
+        f"{'step':<52}{'wall_s':>9}{'%run':>7}{'cpu_s':>9}{'child_cpu':>10}"
+        f"{'peak_mb':>9}{'rss_mb':>9}"
+    ]
+    for step in report["steps"]:
+        name = "  " * step["depth"] + step["name"]
+        if step.get("worker"):
+            name += " [worker]"
+        if step.get("cache"):
+            name += f" [{step['cache']}]"
+        wall = step.get("wall_s")
+        share = None if wall is None or not total else 100 * wall / total
+        lines.append(
+            f"{name[:51]:<52}{_cell(wall, '.3f'):>9}{_cell(share, '.1f'):>7}"
+            f"{_cell(step.get('cpu_s'), '.3f'):>9}"
+            f"{_cell(step.get('children_cpu_s'), '.3f'):>10}"
+            f"{_cell(step.get('traced_peak_mb', step.get('rss_peak_mb')), '.1f'):>9}"
+            f"{_cell(step.get('rss_end_mb'), '.1f'):>9}"
+        )
+    leaves = [
+        step
+        for i, step in enumerate(report["steps"])
+        if step.get("wall_s") is not None
+        and not any(
+            other["path"].startswith(step["path"] + "/")
+            for other in report["steps"][i + 1 :]
+        )
+    ]
+    if leaves:
+        top = max(leaves, key=lambda step: step["wall_s"])
+        lines.append(f"\nSlowest step: {top['path']} ({top['wall_s']:.3f}s)")
+    meta = report["meta"]
+    lines.append(
+        f"Run: wall {_cell(meta['wall_s'], '.3f')}s | cpu {_cell(meta['cpu_s'], '.3f')}s"
+        f" | max rss {_cell(meta['max_rss_mb'], '.1f')} MB"
+    )
+    return "\n".join(lines)
+
+
+def compare_reports(before, after):
+    ## Wall time per step path; steps present in only one run show "-".
+    before_steps = {step["path"]: step for step in before["steps"]}
+    after_steps = {step["path"]: step for step in after["steps"]}
+    paths = list(before_steps) + [p for p in after_steps if p not in before_steps]
+    lines = [f"{'step':<60}{'before_s':>10}{'after_s':>10}{'ratio':>8}"]
+    for path in paths:
+        old = before_steps.get(path, {}).get("wall_s")
+        new = after_steps.get(path, {}).get("wall_s")
+        ratio = new / old if old and new is not None else None
+        lines.append(
+            f"{path[:59]:<60}{_cell(old, '.3f'):>10}{_cell(new, '.3f'):>10}"
+            f"{_cell(ratio, '.2f'):>8}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    ## python -m src.profiler artifacts/train_profile.json [other_profile.json]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("report")
+    parser.add_argument("compare_to", nargs="?")
+    args = parser.parse_args()
+
+    with open(args.report) as file:
+        report = json.load(file)
+    if args.compare_to:
+        with open(args.compare_to) as file:
+            print(compare_reports(report, json.load(file)))
+    else:
+        print(summary_table(report))
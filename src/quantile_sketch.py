@@ -0,0 +1,79 @@
+import numpy as np
+
+## KLL quantile sketch (Karnin, Lang and Liberty, 2016). Items live in levels;
+## an item at level h stands for 2**h inputs. When a level outgrows its
+## capacity it is sorted and every other item (random offset) is promoted one
+## level up, so memory stays O(k log(n/k)) and the rank error is about 1.7/k.
+## Sketches built on different chunks or processes can be merged.
+
+
+class QuantileSketch:
+    def __init__(self, k=200, random_state=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(random_state)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[:0]
+                if len(items) % 2:
+                    index = self.rng.integers(len(items))
+                    keep = items[index : index + 1]
+                    items = np.delete(items, index)
+                promoted = items[self.rng.integers(2) :: 2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], promoted]
+                )
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.n += values.size
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        if self.n == 0:
+            return np.nan
+        if len(self.levels[0]) == self.n:
+            ## Nothing compacted yet: exact, interpolated like pandas.
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(items), 2**level) for level, items in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1])
+        return float(items[order][min(index, len(items) - 1)])
+
+    def median(self):
+        return self.quantile(0.5)
+
+    @property
+    def size(self):
+        return sum(len(items) for items in self.levels)
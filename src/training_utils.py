@@ -0,0 +1,725 @@
+import os
+import sys
+import copy
+import time
+import tracemalloc
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_yaml, iter_table
+from src.profiler import profile_step, record_step, PeakRss, TracedPeak
+from sklearn.linear_model import (
+    LinearRegression,
+    SGDRegressor,
+    PassiveAggressiveRegressor,
+)
+from sklearn.neural_network import MLPRegressor
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.ensemble import (
+    RandomForestRegressor,
+    AdaBoostRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+)
+from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+from sklearn.base import clone
+from sklearn.model_selection import (
+    GridSearchCV,
+    KFold,
+    ParameterGrid,
+    ParameterSampler,
+    cross_val_score,
+)
+from joblib import Parallel, delayed
+
+import mlflow  # ML-Flow Tracking
+import mlflow.sklearn
+from mlflow.models import infer_signature
+from urllib.parse import urlparse
+
+
+def eval_metrics(actual, predicted):
+    try:
+        rmse = np.sqrt(mean_squared_error(actual, predicted))
+        mae = mean_absolute_error(actual, predicted)
+        r2 = r2_score(actual, predicted)
+        return (rmse, mae, r2)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+NATIVE_MODEL = "Hist_gradient_boost_reg"
+
+
+## Profiler step field for a candidate's peak, by how it was measured.
+PEAK_FIELDS = {"tracemalloc": "traced_peak_mb", "rss": "rss_peak_mb"}
+
+
+def _memory_meter(trace_memory):
+    ## tracemalloc slows python-heavy fits several-fold and would skew fit_time,
+    ## so it is used only when asked for (or already on in a profiled run);
+    ## otherwise the candidate's RSS high-water mark is sampled.
+    if trace_memory or tracemalloc.is_tracing():
+        return TracedPeak()
+    return PeakRss()
+
+
+def _memory_report(memory):
+    peak = None if memory.peak_mb is None else round(memory.peak_mb, 2)
+    return {"peak_memory_mb": peak, "peak_memory_source": memory.source}
+
+
+def fit_candidate(name, model, X_train, X_test, y_train, y_test, trace_memory=False):
+    with profile_step(f"candidate:{name}"), _memory_meter(trace_memory) as memory:
+        start = time.perf_counter()
+        model = model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_time = time.perf_counter() - start
+
+    report = {
+        "r2": r2_score(y_test, y_pred),
+        "fit_time": round(fit_time, 4),
+        "predict_time": round(predict_time, 4),
+        **_memory_report(memory),
+    }
+    return name, model, report
+
+
+def _fit_candidate_process(conn, name, *args):
+    try:
+        result = fit_candidate(name, *args)[1:]
+    except Exception as e:
+        result = RuntimeError(f"Candidate {name} failed: {e}")
+    conn.send(result)
+    conn.close()
+
+
+def _fit_in_processes(jobs, n_workers, time_budget=None):
+    ## Runs each candidate in a process of its own, at most n_workers at a time.
+    ## A candidate's deadline starts when its process does; past it the process
+    ## is terminated and the candidate skipped. Returns ({name: (model, report)},
+    ## [skipped names]).
+    pending = list(jobs.items())
+    running = {}
+    results, skipped = {}, []
+    try:
+        while pending or running:
+            while pending and len(running) < n_workers:
+                name, args = pending.pop(0)
+                reader, writer = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_fit_candidate_process, args=(writer, name, *args)
+                )
+                process.start()
+                writer.close()
+                deadline = None
+                if time_budget is not None:
+                    deadline = time.monotonic() + time_budget
+                running[reader] = (name, process, deadline)
+
+            deadlines = [d for *_, d in running.values() if d is not None]
+            timeout = None
+            if deadlines:
+                timeout = max(0, min(deadlines) - time.monotonic())
+            for reader in multiprocessing.connection.wait(list(running), timeout):
+                name, process, _ = running.pop(reader)
+                try:
+                    result = reader.recv()
+                except EOFError:
+                    result = RuntimeError(f"Candidate {name} exited without a result")
+                reader.close()
+                process.join()
+                if isinstance(result, Exception):
+                    raise result
+                results[name] = result
+
+            now = time.monotonic()
+            for reader, (name, process, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    del running[reader]
+                    process.terminate()
+                    process.join()
+                    reader.close()
+                    skipped.append(name)
+    finally:
+        for reader, (name, process, _) in running.items():
+            process.terminate()
+            process.join()
+            reader.close()
+    return results, skipped
+
+
+def get_best_model(
+    X_train,
+    X_test,
+    y_train,
+    y_test,
+    n_jobs=1,
+    time_budget=None,
+    native=None,
+    trace_memory=False,
+):
+    ## native: (X_native_train, X_native_test, categorical_mask) adds the
+    ## histogram boosting candidate on ordinal-coded categoricals.
+    try:
+        models = {
+            "Linear_reg": LinearRegression(),
+            "Decision_tree_reg": DecisionTreeRegressor(),
+            "Random_forest_reg": RandomForestRegressor(),
+            "Ada_boost_reg": AdaBoostRegressor(),
+            "Gradient_boost_reg": GradientBoostingRegressor(),
+        }
+        inputs = {name: (X_train, X_test) for name in models}
+        if native is not None:
+            X_native_train, X_native_test, categorical_mask = native
+            models[NATIVE_MODEL] = HistGradientBoostingRegressor(
+                categorical_features=categorical_mask, random_state=42
+            )
+            inputs[NATIVE_MODEL] = (X_native_train, X_native_test)
+
+        model_report: dict = {}
+        fitted: dict = {}
+        if n_jobs == 1:
+            for name, model in models.items():
+                name, model, report = fit_candidate(
+                    name,
+                    model,
+                    inputs[name][0],
+                    inputs[name][1],
+                    y_train,
+                    y_test,
+                    trace_memory,
+                )
+                fitted[name], model_report[name] = model, report
+            ## In-process fits cannot be interrupted, so they are judged afterwards.
+            for report in model_report.values():
+                if time_budget is not None and report["fit_time"] > time_budget:
+                    report["skipped"] = "time budget exceeded"
+        else:
+            n_workers = min(len(models), n_jobs if n_jobs > 0 else os.cpu_count())
+            jobs = {
+                name: (
+                    model,
+                    inputs[name][0],
+                    inputs[name][1],
+                    y_train,
+                    y_test,
+                    trace_memory,
+                )
+                for name, model in models.items()
+            }
+            results, skipped = _fit_in_processes(jobs, n_workers, time_budget)
+            for name, (model, report) in results.items():
+                fitted[name], model_report[name] = model, report
+                peak_field = PEAK_FIELDS[report["peak_memory_source"]]
+                record_step(
+                    f"candidate:{name}",
+                    wall_s=report["fit_time"] + report["predict_time"],
+                    worker=True,
+                    **{peak_field: report["peak_memory_mb"]},
+                )
+            for name in skipped:
+                model_report[name] = {"skipped": "time budget exceeded"}
+            model_report = {name: model_report[name] for name in models}
+
+        for name, report in model_report.items():
+            logging.info(f"Candidate {name}: {report}")
+
+        scores = {
+            name: report["r2"]
+            for name, report in model_report.items()
+            if "skipped" not in report
+        }
+        if not scores:
+            raise ValueError("Every candidate model exceeded the time budget.")
+        best_model_name = max(scores, key=scores.get)
+        best_score = scores[best_model_name]
+        best_model = fitted[best_model_name]
+
+        return (model_report, best_model_name, best_model, best_score)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def _cv_score(model, params, X, y, cv):
+    estimator = clone(model).set_params(**params)
+    score = np.nanmean(cross_val_score(estimator, X, y, cv=cv, n_jobs=-1))
+    return -np.inf if np.isnan(score) else float(score)
+
+
+## With a fixed random_state the first n trees/stages of these ensembles are the
+## n_estimators=n model, so every size in a grid can be scored from one fit:
+## forests grow with warm_start, gradient boosting is read off staged_predict
+## and AdaBoost predicts with its first n estimators (its staged_predict
+## re-predicts every prefix, which costs more than refitting).
+WARM_START_MODELS = (RandomForestRegressor,)
+STAGED_MODELS = (GradientBoostingRegressor,)
+PREFIX_MODELS = (AdaBoostRegressor,)
+
+
+def _sweepable(model, param_grid):
+    return (
+        isinstance(model, WARM_START_MODELS + STAGED_MODELS + PREFIX_MODELS)
+        and isinstance(param_grid, dict)
+        and len(param_grid.get("n_estimators") or []) > 1
+        and getattr(model, "n_iter_no_change", None) is None
+        and model.get_params().get("random_state") is not None
+    )
+
+
+def _sweep_fold(model, params, sizes, X, y, train, test):
+    ## r2 on one CV fold for every ensemble size in `sizes` (ascending).
+    X_train, y_train, X_test, y_test = X[train], y[train], X[test], y[test]
+    estimator = clone(model).set_params(**params)
+    try:
+        if isinstance(estimator, WARM_START_MODELS):
+            estimator.set_params(warm_start=True)
+            scores = []
+            for size in sizes:
+                estimator.set_params(n_estimators=size).fit(X_train, y_train)
+                scores.append(r2_score(y_test, estimator.predict(X_test)))
+            return scores
+
+        estimator.set_params(n_estimators=sizes[-1]).fit(X_train, y_train)
+        if isinstance(estimator, PREFIX_MODELS):
+            ## A fit that stopped early (perfect fit) keeps fewer estimators; the
+            ## slice then is the whole model, as a refit would be.
+            scores = []
+            for size in sizes:
+                prefix = copy.copy(estimator)
+                prefix.estimators_ = estimator.estimators_[:size]
+                scores.append(r2_score(y_test, prefix.predict(X_test)))
+            return scores
+
+        scores = {}
+        for stage, y_pred in enumerate(estimator.staged_predict(X_test), 1):
+            if stage in sizes:
+                scores[stage] = r2_score(y_test, y_pred)
+        return [scores[size] for size in sizes]
+    except Exception as e:
+        ## Same as GridSearchCV's error_score=np.nan.
+        logging.info(f"Sweep fit failed for {params}: {e}")
+        return [np.nan] * len(sizes)
+
+
+def sweep_grid_search(model, param_grid, X, y, search_config):
+    ## Exhaustive grid with n_estimators swept inside each fit; folds, scorer
+    ## and tie-breaking (first best in ParameterGrid order) follow GridSearchCV.
+    y = np.asarray(y)
+    candidates = list(ParameterGrid(param_grid))
+    sizes = sorted(set(param_grid["n_estimators"]))
+    others = list(
+        ParameterGrid({k: v for k, v in param_grid.items() if k != "n_estimators"})
+    )
+    folds = list(KFold(n_splits=search_config["cv"]).split(X))
+    results = Parallel(n_jobs=-1)(
+        delayed(_sweep_fold)(model, params, sizes, X, y, train, test)
+        for params in others
+        for train, test in folds
+    )
+    mean_scores = np.asarray(results).reshape(len(others), len(folds), len(sizes))
+    mean_scores = mean_scores.mean(axis=1)
+
+    def key(params):
+        return repr(sorted((k, v) for k, v in params.items() if k != "n_estimators"))
+
+    lookup = {
+        (key(params), size): mean_scores[i, j]
+        for i, params in enumerate(others)
+        for j, size in enumerate(sizes)
+    }
+    scores = np.array(
+        [lookup[(key(params), params["n_estimators"])] for params in candidates]
+    )
+    if np.isnan(scores).all():
+        raise ValueError("Every candidate fit failed during the sweep.")
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    best = int(np.argmax(scores))
+    return candidates[best], float(scores[best]), len(candidates)
+
+
+def grid_search(model, param_grid, X, y, search_config):
+    if search_config.get("warm_start") and _sweepable(model, param_grid):
+        return sweep_grid_search(model, param_grid, X, y, search_config)
+    gs = GridSearchCV(model, param_grid=param_grid, cv=search_config["cv"], n_jobs=-1)
+    gs.fit(X, y)
+    return gs.best_params_, gs.best_score_, len(gs.cv_results_["params"])
+
+
+def random_search(model, param_grid, X, y, search_config):
+    start = time.perf_counter()
+    best_params, best_score, evaluated, stale = None, -np.inf, 0, 0
+    sampler = ParameterSampler(
+        param_grid,
+        n_iter=search_config["n_iter"],
+        random_state=search_config["random_state"],
+    )
+    for params in sampler:
+        if time.perf_counter() - start > search_config["time_budget"]:
+            logging.info("Random search stopped: time budget exhausted.")
+            break
+        score = _cv_score(model, params, X, y, search_config["cv"])
+        evaluated += 1
+        if best_params is None or score > best_score:
+            best_params, best_score, stale = params, score, 0
+        else:
+            stale += 1
+        if stale >= search_config["early_stopping_rounds"]:
+            logging.info(f"Random search stopped: no gain in {stale} candidates.")
+            break
+    return best_params, best_score, evaluated
+
+
+def halving_search(model, param_grid, X, y, search_config):
+    ## Successive halving: score many candidates on a small row subset, keep the
+    ## best 1/factor and grow the subset by factor until one candidate is left.
+    start = time.perf_counter()
+    factor = search_config["halving_factor"]
+    n_samples = len(y)
+    rng = np.random.RandomState(search_config["random_state"])
+    order = rng.permutation(n_samples)
+
+    candidates = list(ParameterGrid(param_grid))
+    if len(candidates) > search_config["n_iter"]:
+        candidates = list(
+            ParameterSampler(
+                param_grid,
+                n_iter=search_config["n_iter"],
+                random_state=search_config["random_state"],
+            )
+        )
+    n_rungs = max(1, int(np.ceil(np.log(len(candidates)) / np.log(factor))))
+    resources = max(
+        search_config["min_resources"], n_samples // factor ** (n_rungs - 1)
+    )
+
+    best_params, best_score, evaluated = candidates[0], -np.inf, 0
+    while True:
+        subset = order[: min(resources, n_samples)]
+        scores = []
+        for params in candidates:
+            if time.perf_counter() - start > search_config["time_budget"]:
+                break
+            scores.append(
+                _cv_score(model, params, X[subset], y[subset], search_config["cv"])
+            )
+            evaluated += 1
+        ranked = sorted(zip(scores, range(len(scores))), key=lambda item: -item[0])
+        if ranked:
+            best_score, best_params = ranked[0][0], candidates[ranked[0][1]]
+        if len(scores) < len(candidates):
+            logging.info("Halving search stopped: time budget exhausted.")
+            break
+        if len(candidates) == 1 or resources >= n_samples:
+            break
+        keep = max(1, int(np.ceil(len(candidates) / factor)))
+        candidates = [candidates[index] for _, index in ranked[:keep]]
+        resources *= factor
+    return best_params, best_score, evaluated
+
+
+SEARCH_STRATEGIES = {
+    "grid": grid_search,
+    "random": random_search,
+    "halving": halving_search,
+}
+
+SEARCH_DEFAULTS = {
+    "strategy": "grid",
+    "cv": 3,
+    "n_iter": 50,
+    "time_budget": 600,
+    "early_stopping_rounds": 20,
+    "halving_factor": 3,
+    "min_resources": 100,
+    "random_state": 42,
+    "warm_start": True,
+}
+
+
+def finetune_best_model(X_train, X_test, y_train, y_test, best_model_name, best_model):
+    try:
+        logging.info("Loading yaml file...")
+        params = load_yaml(os.path.join("config", "params.yaml"))
+        param_grid = params["models"][best_model_name]["param_grid"]
+        search_config = {**SEARCH_DEFAULTS, **(params.get("search") or {})}
+        strategy = search_config["strategy"]
+        logging.info(f"Param_Grid: {param_grid}")
+        logging.info(f"Search: {search_config}")
+        ## Candidates are built unseeded; a fixed seed makes the search and the
+        ## refit reproducible, and the sweep match GridSearchCV.
+        if best_model.get_params().get("random_state", 0) is None:
+            best_model.set_params(random_state=search_config["random_state"])
+
+        start = time.perf_counter()
+        with profile_step(f"{strategy}_search"):
+            best_parameters, cv_score, evaluated = SEARCH_STRATEGIES[strategy](
+                best_model, param_grid, X_train, y_train, search_config
+            )
+        search_time = time.perf_counter() - start
+        logging.info(f"Best parameters: {best_parameters}")
+
+        with profile_step("refit"):
+            best_model.set_params(**best_parameters)
+            best_model.fit(X_train, y_train)
+            y_pred = best_model.predict(X_test)
+        tuned_score = r2_score(y_test, y_pred)
+        logging.info(
+            f"Search strategy: {strategy} | candidates: {evaluated} | "
+            f"time: {search_time:.2f}s | cv_score: {cv_score:.4f} | "
+            f"tuned_score: {tuned_score:.4f}"
+        )
+
+        return best_parameters, tuned_score
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def mlflow_tracking(X_train, X_test, y_train, y_test, best_model, best_parameters):
+    try:
+        with mlflow.start_run():
+            logging.info("ML-Flow Tracking Started...")
+            best_model.fit(X_train, y_train)
+            y_pred = best_model.predict(X_test)
+            rmse, mae, r2 = eval_metrics(y_test, y_pred)
+            logging.info(f"Metrics are RMSE: {rmse} | MAE: {mae} | R2: {r2}")
+
+            keys = list(best_parameters.keys())
+            values = list(best_parameters.values())
+            for i in range(len(best_parameters)):
+                mlflow.log_param(f"{keys[i]}", values[i])
+
+            mlflow.log_metric("rmse", rmse)
+            mlflow.log_metric("mae", mae)
+            mlflow.log_metric("r2", r2)
+
+            predictions = best_model.predict(X_train)
+            signature = infer_signature(X_train, predictions)
+            remote_server_uri = (
+                "https://dagshub.com/NarenBot/Insurance_Premium_Prediction.mlflow"
+            )
+            mlflow.set_tracking_uri = remote_server_uri
+
+            tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
+            logging.info(f"Tracking_url_type_store: {tracking_url_type_store}")
+            if tracking_url_type_store != "file":
+                mlflow.sklearn.log_model(
+                    best_model,
+                    "model",
+                    registered_model_name=str(type(best_model)).split(".")[-1][:-2],
+                    signature=signature,
+                )
+            else:
+                mlflow.sklearn.log_model(best_model, "model", signature=signature)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+class ChunkStream:
+    ## Re-iterable (X, y) batches of a table, transformed by the fitted
+    ## preprocessor one chunk at a time. `split` keeps every `holdout_every`-th
+    ## row ("holdout") or the others ("fit"), for tuning without the test file.
+    def __init__(
+        self, path, preprocessor, target, chunk_size, split=None, holdout_every=5
+    ):
+        self.path = path
+        self.preprocessor = preprocessor
+        self.target = target
+        self.chunk_size = chunk_size
+        self.split = split
+        self.holdout_every = holdout_every
+
+    def subset(self, split):
+        return ChunkStream(
+            self.path,
+            self.preprocessor,
+            self.target,
+            self.chunk_size,
+            split=split,
+            holdout_every=self.holdout_every,
+        )
+
+    def __iter__(self):
+        offset = 0
+        for chunk in iter_table(self.path, self.chunk_size):
+            if self.split is not None:
+                holdout = (
+                    np.arange(offset, offset + len(chunk)) % self.holdout_every
+                ) == 0
+                offset += len(chunk)
+                chunk = chunk[holdout if self.split == "holdout" else ~holdout]
+            if len(chunk) == 0:
+                continue
+            X = self.preprocessor.transform(chunk.drop(self.target, axis=1))
+            yield X, chunk[self.target].to_numpy(dtype=np.float64)
+
+
+def streaming_metrics(model, stream):
+    ## rmse, mae and r2 accumulated over the stream; never holds more than a chunk.
+    n, sum_y, sum_y2, sse, sae = 0, 0.0, 0.0, 0.0, 0.0
+    for X, y in stream:
+        error = y - model.predict(X)
+        n += len(y)
+        sum_y += y.sum()
+        sum_y2 += np.dot(y, y)
+        sse += np.dot(error, error)
+        sae += np.abs(error).sum()
+    sst = sum_y2 - sum_y * sum_y / n
+    return (np.sqrt(sse / n), sae / n, 1 - sse / sst)
+
+
+def fit_streaming(model, stream, epochs):
+    for _ in range(epochs):
+        for X, y in stream:
+            model.partial_fit(X, y)
+    return model
+
+
+def fit_streaming_candidate(
+    name, model, train_stream, test_stream, epochs, trace_memory=False
+):
+    with profile_step(f"candidate:{name}"), _memory_meter(trace_memory) as memory:
+        start = time.perf_counter()
+        model = fit_streaming(model, train_stream, epochs)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, _, r2 = streaming_metrics(model, test_stream)
+        predict_time = time.perf_counter() - start
+
+    report = {
+        "r2": r2,
+        "fit_time": round(fit_time, 4),
+        "predict_time": round(predict_time, 4),
+        **_memory_report(memory),
+    }
+    return name, model, report
+
+
+def get_best_streaming_model(
+    train_stream, test_stream, epochs, time_budget=None, trace_memory=False
+):
+    ## Same report and return shape as get_best_model, for partial_fit models.
+    try:
+        models = {
+            "SGD_reg": SGDRegressor(),
+            "Passive_aggressive_reg": PassiveAggressiveRegressor(),
+            "MLP_reg": MLPRegressor(
+                hidden_layer_sizes=(64, 32), learning_rate_init=0.01
+            ),
+        }
+
+        model_report: dict = {}
+        fitted: dict = {}
+        for name, model in models.items():
+            name, model, report = fit_streaming_candidate(
+                name, model, train_stream, test_stream, epochs, trace_memory
+            )
+            if time_budget is not None and report["fit_time"] > time_budget:
+                report["skipped"] = "time budget exceeded"
+            fitted[name], model_report[name] = model, report
+            logging.info(f"Candidate {name}: {report}")
+
+        scores = {
+            name: report["r2"]
+            for name, report in model_report.items()
+            if "skipped" not in report
+        }
+        if not scores:
+            raise ValueError("Every candidate model exceeded the time budget.")
+        best_model_name = max(scores, key=scores.get)
+        best_score = scores[best_model_name]
+        best_model = fitted[best_model_name]
+
+        return (model_report, best_model_name, best_model, best_score)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def finetune_streaming_model(
+    train_stream, test_stream, best_model_name, best_model, epochs
+):
+    ## Candidates train on the "fit" rows of the train file and are ranked on its
+    ## "holdout" rows; the winner is refitted on the whole file and scored on test.
+    try:
+        params = load_yaml(os.path.join("config", "params.yaml"))
+        param_grid = params["models"][best_model_name]["param_grid"]
+        search_config = {**SEARCH_DEFAULTS, **(params.get("search") or {})}
+        candidates = list(ParameterGrid(param_grid))
+        if len(candidates) > search_config["n_iter"]:
+            candidates = list(
+                ParameterSampler(
+                    param_grid,
+                    n_iter=search_config["n_iter"],
+                    random_state=search_config["random_state"],
+                )
+            )
+        fit_stream = train_stream.subset("fit")
+        holdout_stream = train_stream.subset("holdout")
+
+        start = time.perf_counter()
+        best_parameters, holdout_score, evaluated = candidates[0], -np.inf, 0
+        with profile_step("streaming_search"):
+            for candidate in candidates:
+                if time.perf_counter() - start > search_config["time_budget"]:
+                    logging.info("Streaming search stopped: time budget exhausted.")
+                    break
+                model = fit_streaming(
+                    clone(best_model).set_params(**candidate), fit_stream, epochs
+                )
+                _, _, score = streaming_metrics(model, holdout_stream)
+                evaluated += 1
+                if score > holdout_score:
+                    best_parameters, holdout_score = candidate, score
+        search_time = time.perf_counter() - start
+
+        with profile_step("refit"):
+            best_model = clone(best_model).set_params(**best_parameters)
+            fit_streaming(best_model, train_stream, epochs)
+            metrics = streaming_metrics(best_model, test_stream)
+        logging.info(
+            f"Streaming search | candidates: {evaluated} | time: {search_time:.2f}s | "
+            f"holdout_score: {holdout_score:.4f} | tuned_score: {metrics[2]:.4f}"
+        )
+
+        return best_model, best_parameters, metrics
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def mlflow_streaming_tracking(best_model, best_parameters, metrics):
+    ## mlflow_tracking refits on in-memory arrays; here the model is already
+    ## fitted on the stream and its test metrics are passed in.
+    try:
+        with mlflow.start_run():
+            rmse, mae, r2 = metrics
+            logging.info(f"Metrics are RMSE: {rmse} | MAE: {mae} | R2: {r2}")
+            for key, value in best_parameters.items():
+                mlflow.log_param(key, value)
+            mlflow.log_metric("rmse", rmse)
+            mlflow.log_metric("mae", mae)
+            mlflow.log_metric("r2", r2)
+
+            tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
+            if tracking_url_type_store != "file":
+                mlflow.sklearn.log_model(
+                    best_model,
+                    "model",
+                    registered_model_name=type(best_model).__name__,
+                )
+            else:
+                mlflow.sklearn.log_model(best_model, "model")
+
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -1,47 +1,42 @@
 import os
 import sys
+import hashlib
 import pandas as pd
-import numpy as np
 import dill
 import yaml
 
 from src.exception import CustomException
-from src.logger import logging
-from sklearn.linear_model import LinearRegression
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.ensemble import (
-    RandomForestRegressor,
-    AdaBoostRegressor,
-    GradientBoostingRegressor,
-)
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-from sklearn.model_selection import GridSearchCV
-
-import mlflow  # ML-Flow Tracking
-import mlflow.sklearn
-from mlflow.models import infer_signature
-from urllib.parse import urlparse
+from src.profiler import profile_step
 import warnings
 
 warnings.filterwarnings("ignore")
 
+## Only what both the serving and the training path need lives here; model
+## selection, search and mlflow tracking are in src.training_utils so importing
+## the predictor does not load the training stack.
+
 
 def missing_treatment(missing_df):
-    columns = missing_df.columns
-    for col in columns:
+    ## Fill values only for columns with gaps, then a single fillna.
+    fill = {}
+    for col in missing_df.columns[missing_df.isna().any()]:
         if missing_df[col].dtype == "object":
-            missing_df[col].fillna(missing_df[col].mode()[0], inplace=True)
+            fill[col] = missing_df[col].mode()[0]
         else:
-            missing_df[col].fillna(missing_df[col].median(), inplace=True)
+            fill[col] = missing_df[col].median()
 
-    return missing_df
+    return missing_df.fillna(fill) if fill else missing_df
 
 
 def save_object(obj, file_path):
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "wb") as file:
-            dill.dump(obj=obj, file=file)
+        with profile_step(f"save_object:{os.path.basename(file_path)}"):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            ## Write aside and swap, so readers never unpickle a half-written file.
+            temp_path = f"{file_path}.tmp"
+            with open(temp_path, "wb") as file:
+                dill.dump(obj=obj, file=file)
+            os.replace(temp_path, file_path)
     except Exception as e:
         raise CustomException(e, sys)
 
@@ -54,113 +49,118 @@ def load_object(file_path):
         raise CustomException(e, sys)
 
 
-def load_yaml(file_path):
+def table_path(file_path, artifact_format):
+    return f"{os.path.splitext(file_path)[0]}.{artifact_format}"
+
+
+def save_table(df, file_path):
+    ## Parquet/Feather keep the column dtypes in the file, CSV is re-inferred.
     try:
-        with open(file_path) as file:
-            return yaml.safe_load(file)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        extension = os.path.splitext(file_path)[1]
+        if extension == ".parquet":
+            df.to_parquet(file_path, index=False)
+        elif extension == ".feather":
+            df.reset_index(drop=True).to_feather(file_path)
+        else:
+            df.to_csv(file_path, header=True, index=False)
     except Exception as e:
         raise CustomException(e, sys)
 
 
-def eval_metrics(actual, predicted):
+def load_table(file_path):
     try:
-        rmse = np.sqrt(mean_squared_error(actual, predicted))
-        mae = mean_absolute_error(actual, predicted)
-        r2 = r2_score(actual, predicted)
-        return (rmse, mae, r2)
+        extension = os.path.splitext(file_path)[1]
+        if extension == ".parquet":
+            return pd.read_parquet(file_path)
+        if extension == ".feather":
+            return pd.read_feather(file_path)
+        return pd.read_csv(file_path)
     except Exception as e:
         raise CustomException(e, sys)
 
 
-def get_best_model(X_train, X_test, y_train, y_test):
+def iter_table(file_path, chunk_size):
+    ## Yields DataFrames of at most chunk_size rows without loading the file.
     try:
-        models = {
-            "Linear_reg": LinearRegression(),
-            "Decision_tree_reg": DecisionTreeRegressor(),
-            "Random_forest_reg": RandomForestRegressor(),
-            "Ada_boost_reg": AdaBoostRegressor(),
-            "Gradient_boost_reg": GradientBoostingRegressor(),
-        }
-
-        model_report: dict = {}
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            model = model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            score = r2_score(y_test, y_pred)
-            model_report[list(models)[i]] = score
-
-        best_score = max(sorted(list(model_report.values())))
-        best_model_name = list(model_report)[
-            list(model_report.values()).index(best_score)
-        ]
-        best_model = models[best_model_name]
-
-        return (model_report, best_model_name, best_model, best_score)
-
+        extension = os.path.splitext(file_path)[1]
+        if extension == ".parquet":
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        elif extension == ".feather":
+            import pyarrow.feather as feather
+
+            table = feather.read_table(file_path, memory_map=True)
+            for batch in table.to_batches(max_chunksize=chunk_size):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(file_path, chunksize=chunk_size)
     except Exception as e:
         raise CustomException(e, sys)
 
 
-def finetune_best_model(X_train, X_test, y_train, y_test, best_model_name, best_model):
-    try:
-        logging.info("Loading yaml file...")
-        params = load_yaml(os.path.join("config", "params.yaml"))
-        param_grid = params["models"][best_model_name]["param_grid"]
-        logging.info(f"Param_Grid: {param_grid}")
+class ChunkWriter:
+    ## Appends DataFrame chunks to a csv/parquet/feather file; the first chunk
+    ## fixes the schema and later chunks are cast to it.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.extension = os.path.splitext(file_path)[1]
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-        gs = GridSearchCV(best_model, param_grid=param_grid, cv=3, n_jobs=-1)
-        gs.fit(X_train, y_train)
-        best_parameters = gs.best_params_
-        logging.info(f"Best parameters: {best_parameters}")
+    def write(self, df):
+        try:
+            if self.extension in (".parquet", ".feather"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
 
-        best_model.set_params(**gs.best_params_)
-        best_model.fit(X_train, y_train)
-        y_pred = best_model.predict(X_test)
-        tuned_score = r2_score(y_test, y_pred)
+                table = pa.Table.from_pandas(
+                    df, schema=self.schema, preserve_index=False
+                )
+                if self.writer is None:
+                    self.schema = table.schema
+                    if self.extension == ".parquet":
+                        self.writer = pq.ParquetWriter(self.file_path, self.schema)
+                    else:
+                        self.writer = pa.ipc.new_file(self.file_path, self.schema)
+                self.writer.write_table(table)
+            else:
+                df.to_csv(
+                    self.file_path,
+                    mode="a" if self.rows else "w",
+                    header=not self.rows,
+                    index=False,
+                )
+            self.rows += len(df)
+        except Exception as e:
+            raise CustomException(e, sys)
 
-        return best_parameters, tuned_score
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
 
-    except Exception as e:
-        raise CustomException(e, sys)
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.close()
 
-def mlflow_tracking(X_train, X_test, y_train, y_test, best_model, best_parameters):
-    try:
-        with mlflow.start_run():
-            logging.info("ML-Flow Tracking Started...")
-            best_model.fit(X_train, y_train)
-            y_pred = best_model.predict(X_test)
-            rmse, mae, r2 = eval_metrics(y_test, y_pred)
-            logging.info(f"Metrics are RMSE: {rmse} | MAE: {mae} | R2: {r2}")
-
-            keys = list(best_parameters.keys())
-            values = list(best_parameters.values())
-            for i in range(len(best_parameters)):
-                mlflow.log_param(f"{keys[i]}", values[i])
-
-            mlflow.log_metric("rmse", rmse)
-            mlflow.log_metric("mae", mae)
-            mlflow.log_metric("r2", r2)
-
-            predictions = best_model.predict(X_train)
-            signature = infer_signature(X_train, predictions)
-            remote_server_uri = (
-                "https://dagshub.com/NarenBot/Insurance_Premium_Prediction.mlflow"
-            )
-            mlflow.set_tracking_uri = remote_server_uri
-
-            tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-            logging.info(f"Tracking_url_type_store: {tracking_url_type_store}")
-            if tracking_url_type_store != "file":
-                mlflow.sklearn.log_model(
-                    best_model,
-                    "model",
-                    registered_model_name=str(type(best_model)).split(".")[-1][:-2],
-                    signature=signature,
-                )
-            else:
-                mlflow.sklearn.log_model(best_model, "model", signature=signature)
 
+def file_digest(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def load_yaml(file_path):
+    try:
+        with open(file_path) as file:
+            return yaml.safe_load(file)
     except Exception as e:
         raise CustomException(e, sys)
@@ -10,13 +10,19 @@ from yaml.loader import SafeLoader
 
 from src.logger import logging
 from src.exception import CustomException
-from src.pipeline.train_pipeline import TrainPipeline
+from src.pipeline.train_jobs import train_job_manager
 from src.pipeline.predict_pipeline import PredictPipeline, CustomData
-from src.database import DatabaseConnect
+from src.database import DatabaseConnect, DatabaseConnectConfig
+from src.metrics import start_http_server
 
 
 st.set_page_config(page_title="Insurance::Home")
 
+## Streamlit has no route to hang /metrics on; METRICS_PORT serves it on a
+## side port (started once per process, reruns reuse it).
+if os.getenv("METRICS_PORT"):
+    start_http_server(int(os.getenv("METRICS_PORT")))
+
 
 class SessionState:
     def __init__(self, **kwargs):
@@ -81,11 +87,22 @@ elif st.session_state["authentication_status"] == True:
         st.markdown("***")
         training = st.button("Do you need to train the past data? Click Here!")
         if training:
-            st.info("Please wait for sometime, the training is going on...")
-            train = TrainPipeline()
-            tuned_score = train.run_pipeline()
-            accuracy = str(round(tuned_score, 2) * 100)[:2]
-            st.success(f"Model trained successfully with accuracy: {accuracy}%")
+            job, created = train_job_manager.submit()
+            st.session_state["train_job_id"] = job.job_id
+            if not created:
+                st.info("A training job is already running, showing its status.")
+
+        job = train_job_manager.get(st.session_state.get("train_job_id", ""))
+        if job is not None:
+            if job.status in ("queued", "running"):
+                st.info(f"Training is going on... (stage: {job.stage})")
+                st.progress(job.progress)
+                st.button("Refresh status")
+            elif job.status == "succeeded":
+                accuracy = job.result["accuracy"]
+                st.success(f"Model trained successfully with accuracy: {accuracy}%")
+            else:
+                st.error(f"Training failed: {job.error}")
 
     # PREDICTION PIPELINE PAGE
     if page == "Prediction Pipeline":
@@ -122,9 +139,8 @@ elif st.session_state["authentication_status"] == True:
 
         if state.form_submitted:
             input_data = CustomData(age, sex, bmi, children, smoker, region)
-            dataframe = input_data.get_data_as_dataframe()
             preds = PredictPipeline()
-            results = preds.prediction(dataframe)
+            results = preds.fast_prediction([input_data.get_data_as_row()])
             st.success("Predicted Insurance Amount ₹ {:.2f}".format(float(results[0])))
 
             # DATABASE CONNECTION
@@ -147,10 +163,46 @@ elif st.session_state["authentication_status"] == True:
         st.markdown("***")
         st.info("*** User Details ***")
         connect = DatabaseConnect()
-        data, cursor = connect.display_user_database()
-        columns = [desc[0] for desc in cursor.description]
-        df = pd.DataFrame(data, columns=columns)
-        st.dataframe(df.tail())
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            region = st.selectbox(
+                "Region", ["all", "northeast", "northwest", "southeast", "southwest"]
+            )
+        with col2:
+            smoker = st.selectbox("Smoker", ["all", "yes", "no"])
+        with col3:
+            low, high = DatabaseConnectConfig.age_range
+            min_age, max_age = st.slider("Age", low, high, (low, high))
+
+        filters = (region, smoker, min_age, max_age)
+        if st.session_state.get("user_filters") != filters:
+            st.session_state["user_filters"] = filters
+            st.session_state["user_pages"] = [None]
+        pages = st.session_state["user_pages"]
+
+        data, columns, next_before_id = connect.query_user_details(
+            before_id=pages[-1],
+            region=None if region == "all" else region,
+            smoker=None if smoker == "all" else smoker,
+            min_age=min_age,
+            max_age=max_age,
+        )
+        st.dataframe(pd.DataFrame(data, columns=columns))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if len(pages) > 1 and st.button("Newer"):
+                pages.pop()
+                st.rerun()
+        with col2:
+            if next_before_id is not None and st.button("Older"):
+                pages.append(next_before_id)
+                st.rerun()
+
+        st.info("*** Average Expenses By Region ***")
+        data, columns = connect.average_expenses_by_region()
+        st.dataframe(pd.DataFrame(data, columns=columns))
 
     if page == "Contact":
         st.markdown("***")
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from src.database import MongoMirrorConfig, MongoWriteBehind
+
+
+class FakeCollection:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def insert_many(self, documents, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise PyMongoError("connection reset")
+        self.batches.append(list(documents))
+
+
+@pytest.fixture
+def config(tmp_path):
+    class TestConfig(MongoMirrorConfig):
+        batch_size = 3
+        flush_interval = 0.5
+        max_retries = 3
+        backoff_base = 0.001
+        backoff_max = 0.001
+        spool_path = str(tmp_path / "mongo_spool.jsonl")
+
+    return TestConfig
+
+
+def mirror_documents(collection, config, count):
+    mirror = MongoWriteBehind(lambda: collection, config)
+    for i in range(count):
+        mirror.put({"row": i})
+    assert mirror.flush(timeout=10)
+    return mirror
+
+
+def test_batches_are_flushed_at_batch_size(config):
+    collection = FakeCollection()
+    mirror = mirror_documents(collection, config, 7)
+    assert [len(batch) for batch in collection.batches] == [3, 3, 1]
+    assert [doc["row"] for batch in collection.batches for doc in batch] == list(
+        range(7)
+    )
+    assert mirror.stats()["sent"] == 7
+
+
+def test_failed_inserts_are_retried(config):
+    collection = FakeCollection(failures=2)
+    mirror = mirror_documents(collection, config, 2)
+    assert mirror.stats() == {"queued": 0, "sent": 2, "spooled": 0, "retries": 2}
+    assert len(collection.batches) == 1
+
+
+def test_batch_is_spooled_when_retries_run_out(config):
+    collection = FakeCollection(failures=10)
+    mirror = mirror_documents(collection, config, 2)
+    assert mirror.stats() == {"queued": 0, "sent": 0, "spooled": 2, "retries": 3}
+    assert collection.batches == []
+    with open(config.spool_path) as file:
+        spooled = [json.loads(line) for line in file]
+    assert [doc["row"] for doc in spooled] == [0, 1]